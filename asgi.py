@@ -0,0 +1,93 @@
+# asgi.py
+# ASGI entry point, e.g.: uvicorn asgi:application --workers 4
+from core.app import App
+from core.metrics import metrics
+from core.response import Response, TEXT
+import os
+
+mvc_app = App(base_dir=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    request_headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    method = scope.get('method', 'GET')
+    head_only = method == 'HEAD'
+
+    if method not in ('GET', 'HEAD'):
+        # Same as the WSGI entry point (App.__call__): the MVC routes are read-only
+        response = Response("405 Method Not Allowed", status=405, headers={'Allow': 'GET, HEAD'}, content_type=TEXT)
+    elif scope['path'] == '/metrics':
+        body = metrics.render_prometheus().encode('utf-8')
+        await _start(send, 200, {'Content-Type': 'text/plain; version=0.0.4', 'Content-Length': str(len(body))})
+        await send({'type': 'http.response.body', 'body': b'' if head_only else body})
+        return
+    else:
+        response = await mvc_app.dispatch_async(scope['path'], stream=not head_only)
+        # Hashing the body for its ETag and compressing it are CPU work on the whole page
+        response = await mvc_app.run_in_thread(_prepare, response, request_headers)
+
+    if response.streamed:
+        # Streamed page: the chunks are sent as they are rendered
+        await _start(send, response.status, response.headers)
+        if not head_only:
+            await _send_stream(send, response.iter_encoded())
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    if not response.allows_body:
+        await _start(send, response.status, response.headers)
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    body = response.encoded_body()
+    response.headers['Content-Length'] = str(len(body))
+    await _start(send, response.status, response.headers)
+    await send({'type': 'http.response.body', 'body': b'' if head_only else body})
+
+
+def _prepare(response, request_headers):
+    """
+    Adds the ETag (or answers 304) and compresses the body; run on the app's thread pool.
+    """
+    response.make_conditional(request_headers)
+    if mvc_app.compression:
+        response.compress(request_headers)
+    return response
+
+
+async def _send_stream(send, chunks):
+    """
+    Sends a streamed body, produced chunk by chunk on the app's thread pool so the
+    event loop keeps serving other connections while the page renders.
+    """
+    stream = mvc_app.iter_in_thread(chunks)
+    try:
+        async for chunk in stream:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        await stream.aclose()
+
+
+async def _start(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+    })
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,60 @@
+# bench/compare.py
+# Usage: python -m bench.compare baseline.json candidate.json [--threshold 10]
+
+import sys
+import json
+import argparse
+
+
+def compare(baseline, candidate, threshold):
+    """
+    Compares two bench.run result files. Micro-benchmarks regress when their p50
+    grows by more than threshold percent; servers regress when their requests/sec
+    drops by more than threshold percent. Returns (report lines, regression count).
+    """
+    lines = []
+    regressions = 0
+
+    for name, new in candidate.get('micro', {}).items():
+        old = baseline.get('micro', {}).get(name)
+        if not old or not old['p50']:
+            continue
+        change = (new['p50'] - old['p50']) / old['p50'] * 100
+        flag = 'REGRESSION' if change > threshold else ''
+        regressions += bool(flag)
+        lines.append(f"micro  {name:<24} p50 {old['p50']:>10.1f} -> {new['p50']:>10.1f} us  {change:+6.1f}%  {flag}")
+
+    for name, new in candidate.get('macro', {}).items():
+        old = baseline.get('macro', {}).get(name)
+        if not old or 'skipped' in old or 'skipped' in new or not old['requests_per_sec']:
+            continue
+        change = (new['requests_per_sec'] - old['requests_per_sec']) / old['requests_per_sec'] * 100
+        flag = 'REGRESSION' if -change > threshold else ''
+        regressions += bool(flag)
+        lines.append(f"macro  {name:<24} {old['requests_per_sec']:>8.1f} -> {new['requests_per_sec']:>8.1f} req/s  {change:+6.1f}%  {flag}")
+
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files and flag regressions.")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Allowed slowdown in percent (default: 10)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta'].get('commit')}")
+    print(f"candidate {candidate['meta'].get('commit')}")
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print('\n'.join(lines))
+    print(f"{regressions} regression(s) above {args.threshold}%")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
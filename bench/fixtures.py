@@ -0,0 +1,107 @@
+# bench/fixtures.py
+
+import os
+import shutil
+
+# Files and directories of the app that are copied into the benchmark project
+PROJECT_ENTRIES = ['core', 'controllers', 'models', 'views', 'runserver.py', 'wsgi.py', 'asgi.py', 'gunicorn.conf.py']
+
+BENCH_CONTROLLER = '''# controllers/bench.py
+# Synthetic controller generated by bench/fixtures.py
+
+from core.cache import cache_page
+from core.template import stream_response
+
+PLACEHOLDERS = {placeholders}
+ROWS = {rows}
+
+
+class BenchController:
+    def _context(self, rows):
+        context = {{f"value_{{i}}": f"Value number {{i}}" for i in range(PLACEHOLDERS)}}
+        context["page_title"] = "Benchmark"
+        context["items"] = [f"Row {{i}}" for i in range(rows)]
+        return context
+
+    def index(self, render_template_func):
+        """
+        Many partials and placeholders, short list.
+        """
+        return "bench/layout.html", self._context(10)
+
+    def list(self, render_template_func, rows=None):
+        """
+        Same layout with a large item list (ROWS rows by default).
+        """
+        return "bench/layout.html", self._context(int(rows or ROWS))
+
+    @stream_response
+    def stream(self, render_template_func, rows=None):
+        """
+        Large item list produced by a generator and streamed.
+        """
+        context = self._context(0)
+        context["items"] = (f"Row {{i}}" for i in range(int(rows or ROWS)))
+        return "bench/layout.html", context
+
+    @cache_page(ttl=None)
+    def cached(self, render_template_func):
+        """
+        Same page as index, served from the page cache after the first hit.
+        """
+        return "bench/layout.html", self._context(10)
+'''
+
+
+def build_project(target_dir, partials=50, placeholders=100, rows=10000):
+    """
+    Creates a copy of the app in target_dir with a synthetic 'bench' controller and
+    views: a layout including `partials` partials (each of which includes a shared
+    nested partial), `placeholders` placeholders, and an item list of `rows` rows.
+    Returns target_dir.
+    """
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ignore = shutil.ignore_patterns('__pycache__', '*.pyc')
+    for entry in PROJECT_ENTRIES:
+        source = os.path.join(repo_dir, entry)
+        destination = os.path.join(target_dir, entry)
+        if os.path.isdir(source):
+            shutil.copytree(source, destination, ignore=ignore, dirs_exist_ok=True)
+        elif os.path.exists(source):
+            shutil.copy2(source, destination)
+
+    partials_dir = os.path.join(target_dir, 'views', 'bench', 'partials')
+    os.makedirs(partials_dir, exist_ok=True)
+
+    with open(os.path.join(partials_dir, 'shared.html'), 'w') as f:
+        f.write('<span class="shared">{{ page_title }}</span>\n')
+    for i in range(partials):
+        with open(os.path.join(partials_dir, f'p{i}.html'), 'w') as f:
+            f.write(f'<section id="p{i}">\n    <h3>Partial {i}</h3>\n    {{{{ partials/bench/partials/shared }}}}\n</section>\n')
+
+    lines = [
+        '<!DOCTYPE html>',
+        '<html lang="en">',
+        '<head>',
+        '    <meta charset="UTF-8">',
+        '    <title>{{ page_title }}</title>',
+        '    <style>' + ' '.join(f'.c{i} {{ margin: {i}px; }}' for i in range(200)) + '</style>',
+        '</head>',
+        '<body>',
+    ]
+    lines += [f'    {{{{ partials/bench/partials/p{i} }}}}' for i in range(partials)]
+    lines += [f'    <p class="c{i % 200}">{{{{ value_{i} }}}}</p>' for i in range(placeholders)]
+    lines += [
+        '    <ul>',
+        '        {{ for item in items }}<li>{{ item }}</li>{{ endfor }}',
+        '    </ul>',
+        '</body>',
+        '</html>',
+    ]
+    with open(os.path.join(target_dir, 'views', 'bench', 'layout.html'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    with open(os.path.join(target_dir, 'controllers', 'bench.py'), 'w') as f:
+        f.write(BENCH_CONTROLLER.format(placeholders=placeholders, rows=rows))
+
+    return target_dir
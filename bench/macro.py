@@ -0,0 +1,153 @@
+# bench/macro.py
+
+import os
+import sys
+import time
+import socket
+import threading
+import subprocess
+import http.client
+import importlib.util
+
+from bench.stats import summarize
+
+# Paths requested in turn by every load-generating thread
+DEFAULT_PATHS = ['/', '/user/index', '/bench/index', '/bench/cached', '/bench/list']
+
+# Server name -> package it needs; servers whose package is missing are skipped
+SERVER_REQUIREMENTS = {'flask': 'flask', 'gunicorn': 'gunicorn', 'gunicorn-profile': 'gunicorn'}
+
+FLASK_COMMAND = (
+    "import logging; logging.disable(logging.INFO); "
+    "from runserver import app; app.run(host='127.0.0.1', port={port}, threaded=True)"
+)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def server_commands(workers=2):
+    """
+    Servers that can be benchmarked here: the Flask app from runserver.py when Flask
+    is installed, and when gunicorn is installed, plain gunicorn serving wsgi:application with `workers`
+    workers and the production profile from gunicorn.conf.py (its own worker count).
+    Returns a dict of server name -> command builder (port -> argv).
+    """
+    commands = {}
+    if importlib.util.find_spec('flask') is not None:
+        commands['flask'] = lambda port: [sys.executable, '-c', FLASK_COMMAND.format(port=port)]
+    if importlib.util.find_spec('gunicorn') is not None:
+        commands['gunicorn'] = lambda port: [
+            sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+            '--log-level', 'warning', 'wsgi:application',
+        ]
+        commands['gunicorn-profile'] = lambda port: [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+            '--log-level', 'warning',
+        ]
+    return commands
+
+
+def _load(port, paths, duration, concurrency):
+    """
+    Runs `concurrency` keep-alive client threads against the server for `duration`
+    seconds and returns (latencies in ms, status counts, elapsed seconds).
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        local_latencies = []
+        local_statuses = {}
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                status = 'error'
+            local_latencies.append((time.perf_counter() - started) * 1e3)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.monotonic() - started
+
+
+def run_macro(project_dir, servers=None, paths=None, duration=10.0, concurrency=8, workers=2, warmup=1.0):
+    """
+    Starts each server on a free local port with project_dir as its working
+    directory, applies load, and returns server name -> {requests_per_sec, latency, statuses}.
+    Servers that cannot run here are returned as {'skipped': reason}; by default every
+    server in SERVER_REQUIREMENTS is tried.
+    """
+    paths = paths or DEFAULT_PATHS
+    available = server_commands(workers)
+    results = {}
+    for name in servers or list(SERVER_REQUIREMENTS):
+        if name not in available:
+            package = SERVER_REQUIREMENTS.get(name)
+            reason = f"{package} is not installed" if package else "unknown server"
+            results[name] = {'skipped': f"'{name}' is not available in this environment ({reason})"}
+            continue
+        port = _free_port()
+        env = dict(os.environ, PYTHONPATH=project_dir, PYTHONUNBUFFERED='1')
+        process = subprocess.Popen(
+            available[name](port), cwd=project_dir, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            if not _wait_for_port(port):
+                results[name] = {'skipped': f"'{name}' did not start listening on port {port}"}
+                continue
+            _load(port, paths, warmup, concurrency)
+            latencies, statuses, elapsed = _load(port, paths, duration, concurrency)
+            results[name] = {
+                'paths': paths,
+                'duration_sec': round(elapsed, 3),
+                'concurrency': concurrency,
+                'requests': len(latencies),
+                'requests_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+                'latency': summarize(latencies, unit='ms'),
+                'statuses': {str(status): count for status, count in statuses.items()},
+            }
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return results
@@ -0,0 +1,104 @@
+# bench/micro.py
+
+import io
+import os
+import time
+import logging
+import importlib.util
+
+from bench.stats import summarize
+
+
+def _measure(func, iterations, warmup):
+    """
+    Calls func warmup times, then times each of `iterations` calls individually.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(iterations):
+        started = perf_counter_ns()
+        func()
+        samples.append(perf_counter_ns() - started)
+    return summarize([ns / 1e3 for ns in samples], unit='us')
+
+
+def _wsgi_get(application, path, **headers):
+    """
+    Returns a function that sends one GET request through a WSGI application and
+    reads the whole body, without any server or socket involved.
+    """
+    def start_response(status, headers):
+        pass
+
+    def call():
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+            'SERVER_NAME': 'bench', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': False, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            'wsgi.version': (1, 0),
+        }
+        environ.update(headers)
+        body = application(environ, start_response)
+        for _ in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+    return call
+
+
+def run_micro(project_dir, iterations=2000, warmup=100, rows=10000):
+    """
+    Micro-benchmarks the request pipeline of the App in project_dir (built by
+    bench.fixtures.build_project, and already first on sys.path).
+    Returns a dict of benchmark name -> latency summary in microseconds; wsgi_flask
+    is left out when Flask is not installed.
+    """
+    from core.app import App
+
+    # Logging is part of the 404 path, but console output would dominate the timings
+    logging.disable(logging.WARNING)
+    app = App(base_dir=project_dir, frozen_templates=True)
+    controller = app.controllers['bench']
+    view = 'bench/layout.html'
+    context = controller._context(10)
+    large_context = controller._context(rows)
+
+    with open(os.path.join(project_dir, 'views', view), 'r') as f:
+        raw_layout = f.read()
+    expanded_layout = app._include_partials(raw_layout)
+
+    def render_cold():
+        app.templates.invalidate(view)
+        app._render_template(view, context)
+
+    benchmarks = {
+        'replace_placeholders': lambda: app._replace_placeholders(expanded_layout, context),
+        'include_partials': lambda: app._include_partials(raw_layout),
+        'render_template': lambda: app._render_template(view, context),
+        'render_template_cold': render_cold,
+        'render_template_large': lambda: app._render_template(view, large_context),
+        'resolve_route': lambda: app.router.resolve('/bench/index'),
+        'handle_request': lambda: app.handle_request('/bench/index'),
+        'handle_request_cached': lambda: app.handle_request('/bench/cached'),
+        'handle_request_large': lambda: app.handle_request('/bench/list'),
+        'handle_request_stream': lambda: list(app.handle_request('/bench/stream', stream=True)),
+        'handle_request_404': lambda: app.handle_request('/missing/route'),
+        'wsgi_native': _wsgi_get(app, '/bench/index'),
+        'wsgi_native_gzip': _wsgi_get(app, '/bench/index', HTTP_ACCEPT_ENCODING='gzip'),
+    }
+    # Flask is optional: the native WSGI path does not need it
+    if importlib.util.find_spec('flask') is not None:
+        import runserver
+        # Same template settings for the Flask wrapper, so wsgi_flask - wsgi_native is Flask's own cost
+        runserver.mvc_app.templates.frozen = True
+        benchmarks['wsgi_flask'] = _wsgi_get(runserver.app, '/bench/index')
+
+    results = {}
+    for name, func in benchmarks.items():
+        # Large pages are much slower; fewer iterations keep the run short
+        count = max(iterations // 20, 10) if 'large' in name or 'stream' in name else iterations
+        results[name] = _measure(func, count, min(warmup, count))
+    return results
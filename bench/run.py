@@ -0,0 +1,88 @@
+# bench/run.py
+# Usage: python -m bench.run [--micro-only | --macro-only] [--output bench_results.json]
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from bench.fixtures import build_project
+from bench.micro import run_micro
+from bench.macro import run_macro
+
+
+def _git_commit():
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=repo_dir, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MVC request pipeline and write the results as JSON.")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write (default: bench_results.json)")
+    parser.add_argument('--micro-only', action='store_true', help="Skip the HTTP (macro) benchmarks")
+    parser.add_argument('--macro-only', action='store_true', help="Skip the in-process (micro) benchmarks")
+    parser.add_argument('--partials', type=int, default=50, help="Partials included by the synthetic layout")
+    parser.add_argument('--placeholders', type=int, default=100, help="Placeholders in the synthetic layout")
+    parser.add_argument('--rows', type=int, default=10000, help="Rows in the large item list")
+    parser.add_argument('--iterations', type=int, default=2000, help="Timed calls per micro-benchmark")
+    parser.add_argument('--servers', nargs='*', help="Servers to load-test (default: whichever of flask, gunicorn and gunicorn-profile are installed)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load per server")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client connections")
+    parser.add_argument('--workers', type=int, default=2, help="Worker processes for the plain gunicorn server")
+    args = parser.parse_args(argv)
+
+    project_dir = tempfile.mkdtemp(prefix='mvc-bench-')
+    try:
+        build_project(project_dir, partials=args.partials, placeholders=args.placeholders, rows=args.rows)
+        # The benchmarked app is the copy in project_dir, so it also finds the synthetic controller
+        sys.path.insert(0, project_dir)
+
+        results = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'fixture': {'partials': args.partials, 'placeholders': args.placeholders, 'rows': args.rows},
+            },
+        }
+        if not args.macro_only:
+            print("Running micro-benchmarks...")
+            results['micro'] = run_micro(project_dir, iterations=args.iterations, rows=args.rows)
+            for name, summary in results['micro'].items():
+                print(f"  {name:<24} p50 {summary['p50']:>10.1f} us   p95 {summary['p95']:>10.1f} us")
+        if not args.micro_only:
+            print("Running macro-benchmarks...")
+            results['macro'] = run_macro(
+                project_dir, servers=args.servers, duration=args.duration,
+                concurrency=args.concurrency, workers=args.workers,
+            )
+            skipped = [name for name, summary in results['macro'].items() if 'skipped' in summary]
+            if skipped and len(skipped) == len(results['macro']):
+                print(f"  Macro-benchmarks skipped: none of the servers could run ({', '.join(skipped)}).")
+            for name, summary in results['macro'].items():
+                if 'skipped' in summary:
+                    print(f"  {name:<10} skipped: {summary['skipped']}")
+                else:
+                    latency = summary['latency']
+                    print(f"  {name:<16} {summary['requests_per_sec']:>8.1f} req/s   p50 {latency['p50']:.2f} ms   p99 {latency['p99']:.2f} ms")
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+# bench/stats.py
+
+
+def percentile(sorted_samples, q):
+    """
+    Nearest-rank percentile of an already sorted list (q between 0 and 100).
+    """
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(q / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples, unit):
+    """
+    Summary statistics of a list of latencies, all expressed in `unit`.
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+    mean = sum(ordered) / count if count else 0.0
+    return {
+        'unit': unit,
+        'count': count,
+        'mean': round(mean, 3),
+        'min': round(ordered[0], 3) if count else 0.0,
+        'p50': round(percentile(ordered, 50), 3),
+        'p95': round(percentile(ordered, 95), 3),
+        'p99': round(percentile(ordered, 99), 3),
+        'max': round(ordered[-1], 3) if count else 0.0,
+    }
@@ -1,31 +1,30 @@
 # controllers/home.py
 
+from core.cache import cache_page
 from models.home import HomeModel
 
 class HomeController:
     def __init__(self):
         self.model = HomeModel()
 
+    @cache_page(ttl=60)
     def index(self, render_template_func):
         """
         Handles the request for the home page (e.g., / or /home/index).
         It retrieves data from the HomeModel and passes it to the view.
         """
         home_data = self.model.get_home_page_data()
-        items = home_data.get("items", [])
-        # Generate HTML for items directly in the controller for simplicity
-        # In a larger app, this might be handled by a more sophisticated templating system
-        items_html = ''.join(f"<li>{item}</li>" for item in items)
 
         context = {
             "page_title": home_data.get("title", "Default Title"),
             "welcome_message": home_data.get("message", "No message."),
-            "items_html": items_html
+            "items": home_data.get("items", [])
         }
 
         # Returns the view path and the context dictionary
         return "home/index.html", context
 
+    @cache_page(ttl=60)
     def show(self, render_template_func):
         """
         Handles the request for a 'show' page (e.g., /home/show).
@@ -36,13 +35,11 @@ class HomeController:
         to this method's signature (e.g., `def show(self, render_template_func, item_id=None):`).
         """
         home_data = self.model.get_home_page_data()
-        items = home_data.get("items", [])
-        items_html = ''.join(f"<li>{item}</li>" for item in items)
 
         context = {
             "page_title": home_data.get("title", "Default Title"),
             "welcome_message": home_data.get("message", "No message."),
-            "items_html": items_html
+            "items": home_data.get("items", [])
         }
 
         # Returns the view path and the context dictionary
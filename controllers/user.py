@@ -1,26 +1,24 @@
 # controllers/user.py
 
+from core.cache import cache_page
 from models.user import UserModel
 
 class UserController:
     def __init__(self):
         self.model = UserModel()
 
+    @cache_page(ttl=60)
     def index(self, render_template_func):
         """
         Handles the request for the user page (e.g., /user or /user/index).
         It retrieves data from the UserModel and passes it to the view.
         """
         user_data = self.model.get_user_page_data() # This now correctly calls the method in UserModel
-        items = user_data.get("items", [])
-        # Generate HTML for items directly in the controller for simplicity
-        # In a larger app, this might be handled by a more sophisticated templating system
-        items_html = ''.join(f"<li>{item}</li>" for item in items)
 
         context = {
             "page_title": user_data.get("title", "Default User Title"),
             "welcome_message": user_data.get("message", "No user message."),
-            "items_html": items_html
+            "items": user_data.get("items", [])
         }
 
         # Returns the view path and the context dictionary
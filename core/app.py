@@ -1,18 +1,50 @@
 import os
-import re
+import time
+import asyncio
 import logging
+import functools
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 # Import the autoload function
 from core.autoload import load_controllers
+from core.cache import response_cache as default_response_cache, ResponseCache, request_scope, query_cache
+from core.compression import compressed_cache
+from core.dBug import debug_panel, inspect_var, render_panel
+from core.metrics import metrics
+from core.reloader import Reloader
+from core.response import Response, ClosingIterator, EnvironHeaders, TEXT
+from core.router import Router
+from core.template import TemplateCache, Placeholder, PLACEHOLDER_PATTERN, escape
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class App:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, frozen_templates=None, response_cache=None, lazy_controllers=None, preload=None, reload=None):
         self.base_dir = base_dir
-        # Dynamically load all controllers
-        self.controllers = load_controllers(base_dir)
+
+        # Development hot reload: a file watcher pushes changes to views, controllers and
+        # models into the running app (see core/reloader.py)
+        if reload is None:
+            reload = os.environ.get('MVC_RELOAD') == '1'
+
+        # Compiled views are cached in memory. In frozen mode (production) they are never
+        # checked against the files on disk again; otherwise a changed mtime triggers a recompile.
+        # The reloader invalidates changed views itself, so it renders from frozen templates too.
+        if frozen_templates is None:
+            frozen_templates = os.environ.get('MVC_FROZEN_TEMPLATES') == '1'
+        frozen_templates = frozen_templates or reload
+        self.templates = TemplateCache(os.path.join(base_dir, 'views'), frozen=frozen_templates)
+
+        # Dynamically load all controllers. In lazy mode only the filenames are scanned at
+        # startup, and each controller is imported on its first request.
+        if lazy_controllers is None:
+            lazy_controllers = os.environ.get('MVC_LAZY_CONTROLLERS') == '1'
+        self.controllers = load_controllers(
+            base_dir, lazy=lazy_controllers, manifest_path=os.environ.get('MVC_CONTROLLER_MANIFEST')
+        )
 
         # Ensure a default 'home' controller exists, or handle its absence
         if 'home' not in self.controllers:
@@ -20,94 +52,350 @@ class App:
             # You might want to raise an error or provide a fallback here
             # For now, we'll let it proceed, but requests to '/' will fail.
 
+        # Compile the (controller, method) route table once, instead of reflecting on every request
+        self.router = Router(self.controllers)
+
+        # Rendered pages of routes decorated with @cache_page
+        self.response_cache = response_cache or default_response_cache
+        metrics.register_cache('response', self.response_cache)
+        metrics.register_cache('query', query_cache)
+
+        # gzip/brotli negotiated from Accept-Encoding. Turn it off (MVC_COMPRESSION=0)
+        # when a proxy in front already compresses. Precompressed static views from
+        # `python -m core.compression` are loaded from MVC_PRECOMPRESSED_DIR.
+        self.compression = os.environ.get('MVC_COMPRESSION', '1') != '0'
+        precompressed_dir = os.environ.get('MVC_PRECOMPRESSED_DIR')
+        if self.compression and precompressed_dir and os.path.isdir(precompressed_dir):
+            compressed_cache.load(precompressed_dir)
+        metrics.register_cache('compressed', compressed_cache)
+
+        # Development aid: append the view context and any dBug() dumps to every HTML page.
+        # Never enable it in production; it exposes internal data.
+        self.debug_panel = os.environ.get('MVC_DEBUG_PANEL') == '1'
+
+        # Bounded pool that runs sync controllers when serving through ASGI
+        self.thread_pool_size = int(os.environ.get('MVC_THREAD_POOL_SIZE', '16'))
+        self._executor = None
+
+        if preload is None:
+            preload = os.environ.get('MVC_PRELOAD') == '1'
+        if preload:
+            self.preload()
+
+        self.reloader = None
+        if reload:
+            self.reloader = Reloader(self)
+            self.reloader.start()
+
+    def preload(self):
+        """
+        Does all import and compile work up front: every controller (even in lazy mode),
+        its routes, and every view. Call it in the gunicorn master (--preload) so the forked
+        workers share the result copy-on-write instead of each repeating it.
+        """
+        preload_controllers = getattr(self.controllers, 'preload', None)
+        if preload_controllers is not None:
+            preload_controllers()
+        self.router.compile_all()
+        views = self.templates.compile_all()
+        logger.info(f"Preloaded {len(self.router.routes)} routes and {views} views.")
+
 
     def _replace_placeholders(self, content, context):
         """
-        Replaces {{ placeholder }} strings in the content with values from the context dictionary.
+        Replaces {{ placeholder }} strings in the content with HTML-escaped values from
+        the context dictionary. Unknown placeholders are left as they are.
         """
-        pattern = re.compile(r'{{\s*(\w+)\s*}}')
-        return pattern.sub(lambda match: str(context.get(match.group(1), match.group(0))), content)
+        def replace(match):
+            name = match.group(1)
+            if name in context:
+                return escape(context[name])
+            text = Placeholder(name).render(context) if '.' in name else None
+            return match.group(0) if text is None else text
+        return PLACEHOLDER_PATTERN.sub(replace, content)
 
     def _include_partials(self, content):
         """
         Includes partial HTML files specified by {{ partials/path/to/partial }} in the content.
+        Partials come from the index built at startup, so no files are read per call.
         """
-        while '{{ partials/' in content:
-            start = content.find('{{ partials/')
-            end = content.find(' }}', start)
-            if start != -1 and end != -1:
-                partial_name = content[start + len('{{ partials/'):end].strip()
-                partial_path = os.path.join(self.base_dir, 'views', *partial_name.split('/')) + '.html'
-                try:
-                    with open(partial_path, 'r') as p_f:
-                        partial_content = p_f.read()
-                    content = content[:start] + partial_content + content[end + len(' }}'):]
-                except FileNotFoundError:
-                    logger.warning(f"Partial '{partial_name}.html' not found at '{partial_path}'.")
-                    content = content[:start] + f"<!-- Partial '{partial_name}.html' not found -->" + content[end + len(' }}'):]
-            else:
-                break # No more partials found or malformed tag
-        return content
+        return self.templates.partials.expand(content)
 
     def _render_template(self, view_path, context={}):
         """
-        Renders an HTML template by reading its content, including partials,
-        and replacing placeholders with provided context data.
+        Renders an HTML template from its compiled form (view with partials included,
+        split into literal chunks and placeholder slots) using the provided context data.
         """
-        full_path = os.path.join(self.base_dir, 'views', view_path)
         try:
-            with open(full_path, 'r') as f:
-                content = f.read()
-
-            content = self._include_partials(content)
-            content = self._replace_placeholders(content, context)
+            return self.templates.render(view_path, context)
+        except Exception as e:
+            return self._view_error(view_path, e)
 
-            return content
-        except FileNotFoundError:
+    def _view_error(self, view_path, error):
+        """
+        Logs a view rendering failure and returns the error message shown to the client.
+        """
+        if isinstance(error, FileNotFoundError):
+            full_path = os.path.join(self.base_dir, 'views', view_path)
             logger.error(f"View '{view_path}' not found at '{full_path}'.")
             return f"Error: View '{view_path}' not found."
-        except Exception as e:
-            logger.error(f"Error rendering view '{view_path}': {e}")
-            return f"Error rendering view: {e}"
+        logger.error(f"Error rendering view '{view_path}': {error}")
+        return f"Error rendering view: {error}"
+
+    def handle_request(self, path, stream=False):
+        """
+        Handles incoming HTTP requests and returns the response body: the rendered
+        page, or an error message for 404/500 responses. When stream is True and the
+        route is decorated with @stream_response, a generator of HTML chunks is
+        returned instead of a string. Use dispatch() to also get the status code.
+        """
+        return self.dispatch(path, stream).body
+
+    async def handle_request_async(self, path, stream=False):
+        """
+        Async counterpart of handle_request.
+        """
+        return (await self.dispatch_async(path, stream)).body
+
+    def dispatch(self, path, stream=False):
+        """
+        Resolves the URL path against the precompiled route table, calls the
+        controller and renders its view. Returns a core.response.Response.
+        Unknown routes and wrong argument counts are rejected with a 404 before the
+        controller is called.
+        'async def' controller methods are run to completion on a fresh event loop;
+        use dispatch_async from async servers instead.
+        """
+        timings = metrics.start_request()
+        response = None
+        try:
+            route, args, cache_key, response = self._begin_request(path)
+            if response is None:
+                try:
+                    # The scope stays open while the view renders; a streamed page reopens it per chunk
+                    with request_scope() as memo, self._debug_scope() as dumps:
+                        if route.is_async:
+                            started = time.perf_counter()
+                            result = asyncio.run(route.handler(self._render_template, *args))
+                            metrics.record('controller', time.perf_counter() - started)
+                            response = self._finish_request(path, route, cache_key, result, stream, dumps, memo)
+                        else:
+                            response = self._call_controller(path, route, args, cache_key, stream, dumps, memo)
+                except Exception as e:
+                    response = self._controller_error(path, route, e)
+            timings.status = response.status
+            return response
+        finally:
+            self._end_timings(timings, response)
+
+    async def dispatch_async(self, path, stream=False):
+        """
+        Async counterpart of dispatch, used by the ASGI entry point (asgi.py).
+        'async def' controller methods are awaited directly; plain controller methods
+        are offloaded to a bounded thread pool so they never block the event loop.
+        Rendering the view (and filling the page cache) runs on the pool as well.
+        """
+        timings = metrics.start_request()
+        response = None
+        try:
+            route, args, cache_key, response = self._begin_request(path)
+            if response is None:
+                try:
+                    with request_scope() as memo, self._debug_scope() as dumps:
+                        if route.is_async:
+                            started = time.perf_counter()
+                            result = await route.handler(self._render_template, *args)
+                            metrics.record('controller', time.perf_counter() - started)
+                            response = await self.run_in_thread(self._finish_request, path, route, cache_key, result, stream, dumps, memo)
+                        else:
+                            response = await self.run_in_thread(self._call_controller, path, route, args, cache_key, stream, dumps, memo)
+                except Exception as e:
+                    response = self._controller_error(path, route, e)
+            timings.status = response.status
+            return response
+        finally:
+            self._end_timings(timings, response)
+
+    def __call__(self, environ, start_response):
+        """
+        Native WSGI entry point (see wsgi.py), so the app can be served without Flask:
+        real status codes and headers come straight from the Response object.
+        """
+        method = environ.get('REQUEST_METHOD', 'GET')
+        request_headers = EnvironHeaders(environ)
+        if method not in ('GET', 'HEAD'):
+            response = Response("405 Method Not Allowed", status=405, headers={'Allow': 'GET, HEAD'}, content_type=TEXT)
+        else:
+            # PEP 3333 passes the path as latin-1 decoded bytes
+            path = environ.get('PATH_INFO', '/').encode('latin-1').decode('utf-8', 'replace')
+            if path == '/metrics':
+                response = Response(metrics.render_prometheus(), content_type='text/plain; version=0.0.4')
+            else:
+                # HEAD renders the page in full, so its headers carry the ETag and Content-Length
+                response = self.dispatch(path, stream=method == 'GET')
+                response.make_conditional(request_headers)
+            if self.compression:
+                response.compress(request_headers)
+
+        headers = list(response.headers.items())
+        if response.streamed:
+            start_response(response.status_line, headers)
+            return [] if method == 'HEAD' else response.iter_encoded()
+        if not response.allows_body:
+            start_response(response.status_line, headers)
+            return []
+        body = response.encoded_body()
+        headers.append(('Content-Length', str(len(body))))
+        start_response(response.status_line, headers)
+        return [] if method == 'HEAD' else [body]
+
+    def _get_executor(self):
+        """
+        Thread pool for sync controllers under ASGI. Created on first use, so forked
+        workers never inherit threads from the parent process.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.thread_pool_size, thread_name_prefix='mvc-controller')
+        return self._executor
+
+    async def run_in_thread(self, func, *args):
+        """
+        Runs func(*args) on the app's thread pool and returns its result, for blocking
+        work in async servers (see asgi.py). It runs in a copy of the current context,
+        so the request-scoped memo, dBug() collector and the request's metrics are
+        visible there.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await loop.run_in_executor(self._get_executor(), call)
+
+    async def iter_in_thread(self, chunks):
+        """
+        Async iterator over a streamed body (e.g. Response.iter_encoded()). Each chunk
+        is produced on the thread pool, since producing it renders templates and runs
+        whatever model or DB generator feeds them. chunks is closed when the iteration
+        ends or the async iterator is closed (aclose()).
+        """
+        try:
+            while True:
+                chunk = await self.run_in_thread(next, chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _call_controller(self, path, route, args, cache_key, stream, dumps=None, memo=None):
+        """
+        Calls a plain controller method and renders its view.
+        """
+        started = time.perf_counter()
+        result = route.handler(self._render_template, *args)
+        metrics.record('controller', time.perf_counter() - started)
+        return self._finish_request(path, route, cache_key, result, stream, dumps, memo)
 
-    def handle_request(self, path):
+    def _begin_request(self, path):
         """
-        Handles incoming HTTP requests by parsing the URL path to determine
-        the controller, method, and arguments, then dispatches the request.
+        Resolves the route and checks the page cache.
+        Returns (route, args, cache_key, response); response is set when the request
+        is already answered (404 or cached page).
         """
-        segments = [s for s in path.strip('/').split('/') if s]
+        started = time.perf_counter()
+        route, args, error = self.router.resolve(path)
+        metrics.record('resolve', time.perf_counter() - started)
+        if route is None:
+            return None, args, None, Response(error, status=404, content_type=TEXT)
+        metrics.set_route(f"/{route.controller_name}/{route.method_name}")
+
+        cache_key = None
+        if route.cache_page:
+            cache_key = ResponseCache.key_for(route.controller_name, route.method_name, args)
+            # With the debug panel on, the controller always runs so its context can be shown
+            cached = None if self.debug_panel else self.response_cache.get(cache_key)
+            if cached is not None:
+                return route, args, cache_key, Response(cached)
+        return route, args, cache_key, None
+
+    def _end_timings(self, timings, response):
+        if response is not None and response.streamed:
+            # The page is still rendering; closing its body finishes the timings
+            metrics.detach_request()
+        else:
+            metrics.finish_request(timings)
 
-        controller_name = 'home' # Default controller if path is '/' or empty
-        method_name = 'index'    # Default method if path is '/' or only controller specified
-        args = []                # Arguments for the method, extracted from URL segments
+    def _controller_error(self, path, route, error):
+        logger.error(f"Error handling request for '{path}' by {route.controller_name}.{route.method_name}: {error}")
+        return Response(f"500 Internal Server Error: {error}", status=500, content_type=TEXT)
 
-        if segments:
-            controller_name = segments[0].lower()
-            if len(segments) > 1:
-                method_name = segments[1].lower()
-            args = segments[2:]
+    def _debug_scope(self):
+        return debug_panel() if self.debug_panel else nullcontext()
 
-        controller_instance = self.controllers.get(controller_name)
+    def _finish_request(self, path, route, cache_key, result, stream, dumps=None, memo=None):
+        """
+        Renders the (view_name, context) returned by a controller into a Response.
+        dumps are the dBug() entries collected for the debug panel, if it is enabled;
+        memo is the request's @cached_query memo, reopened while a streamed page renders.
+        """
+        view_name, context = result
 
-        if not controller_instance:
-            logger.warning(f"Controller '{controller_name}' not found for path '{path}'.")
-            return "404 Not Found: Controller not found"
+        try:
+            # With the debug panel on, streamed routes render in full so the panel can be attached
+            if stream and route.stream_response and dumps is None:
+                # Compile (or fetch) the view up front, so a missing view is still reported as an error
+                template = self.templates.get(view_name)
+                timings = metrics.current_request()
+                on_close = functools.partial(metrics.finish_request, timings) if timings is not None else None
+                return Response(ClosingIterator(self._stream(template, context, path, memo, timings), on_close))
+            started = time.perf_counter()
+            body = self.templates.render(view_name, context)
+            metrics.record('render', time.perf_counter() - started)
+        except Exception as e:
+            return Response(self._view_error(view_name, e), status=500, content_type=TEXT)
 
-        handler_method = getattr(controller_instance, method_name, None)
+        # Only successfully rendered pages are cached
+        if cache_key is not None:
+            self.response_cache.set(cache_key, body, route.cache_ttl)
+        if dumps is not None:
+            body = self._attach_debug_panel(body, view_name, context, dumps)
+        return Response(body)
 
-        if not handler_method or not callable(handler_method):
-            logger.warning(f"Method '{method_name}' not found or not callable in controller '{controller_name}' for path '{path}'.")
-            return "404 Not Found: Method not found"
+    def _attach_debug_panel(self, body, view_name, context, dumps):
+        """
+        Inserts the debug panel (view context first, then the dBug() dumps) before </body>.
+        """
+        panel = render_panel([(f"context of {view_name}", inspect_var(context)), *dumps])
+        index = body.rfind('</body>')
+        if index == -1:
+            return body + panel
+        return body[:index] + panel + body[index:]
 
+    def _stream(self, template, context, path, memo=None, timings=None):
+        """
+        Yields the chunks of a streamed page. The status line has already been sent by
+        the time a chunk fails, so errors are logged and re-raised: the server then
+        aborts the connection instead of ending a truncated page as if it were complete.
+        Each chunk is rendered inside the request's memo, so @cached_query calls made
+        by lazy context values still hit it; the memo is dropped with the generator.
+        Chunks are timed as the request's render stage; the request's timings are
+        finished by the ClosingIterator around the generator when the server closes it.
+        """
+        chunks = template.stream(context)
         try:
-            view_name, context = handler_method(self._render_template, *args)
-            return self._render_template(view_name, context)
-        except TypeError as te:
-            logger.error(f"TypeError when calling {controller_name}.{method_name} with args {args}: {te}. Check method signature in controller.")
-            return f"500 Internal Server Error: Invalid arguments for method. Please check the URL or controller method definition. Error: {te}"
+            while True:
+                with request_scope(memo), metrics.resume_request(timings):
+                    started = time.perf_counter()
+                    chunk = next(chunks, None)
+                    metrics.record('render', time.perf_counter() - started)
+                if chunk is None:
+                    return
+                yield chunk
         except Exception as e:
-            logger.error(f"Error handling request for '{path}' by {controller_name}.{method_name}: {e}")
-            return f"500 Internal Server Error: {e}"
+            logger.error(f"Error while streaming '{template.view_path}' for '{path}': {e}")
+            raise
+        finally:
+            chunks.close()
 
 if __name__ == "__main__":
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -1,19 +1,26 @@
 # core/autoload.py
 
 import os
+import json
 import importlib
+import threading
 import inspect
 import logging
 
 logger = logging.getLogger(__name__)
 
-def load_controllers(base_dir):
+def load_controllers(base_dir, lazy=False, manifest_path=None):
     """
     Dynamically loads all controller classes from the 'controllers' directory.
     Assumes controller files are named 'controller_name.py' and contain a class
     named 'ControllerNameController'.
     Returns a dictionary mapping lowercase controller names to their instances.
+    With lazy=True only the filenames are scanned, and a LazyControllers mapping is
+    returned that imports and instantiates each controller on first access.
     """
+    if lazy:
+        return LazyControllers(scan_controllers(base_dir, manifest_path))
+
     controllers_path = os.path.join(base_dir, 'controllers')
     loaded_controllers = {}
 
@@ -24,31 +31,160 @@ def load_controllers(base_dir):
     for filename in os.listdir(controllers_path):
         if filename.endswith('.py') and filename != '__init__.py':
             module_name = filename[:-3] # Remove .py extension
-            # Construct the full module path relative to the project root
-            # e.g., 'controllers.home'
-            full_module_path = f"controllers.{module_name}"
+            controller = _instantiate_controller(module_name)
+            if controller is not None:
+                loaded_controllers[module_name.lower()] = controller
 
-            try:
-                # Dynamically import the module
-                module = importlib.import_module(full_module_path)
+    return loaded_controllers
 
-                # Assume controller class name convention: e.g., 'HomeController' for 'home.py'
-                class_name = f"{module_name.capitalize()}Controller"
-                controller_class = getattr(module, class_name, None)
+def _instantiate_controller(module_name, reload=False):
+    """
+    Imports controllers.<module_name> and instantiates its controller class.
+    With reload=True an already imported module is re-executed first (see core/reloader.py).
+    Returns None (after logging why) if that fails.
+    """
+    # Construct the full module path relative to the project root
+    # e.g., 'controllers.home'
+    full_module_path = f"controllers.{module_name}"
+
+    try:
+        # Dynamically import the module
+        module = importlib.import_module(full_module_path)
+        if reload:
+            module = importlib.reload(module)
+
+        # Assume controller class name convention: e.g., 'HomeController' for 'home.py'
+        class_name = f"{module_name.capitalize()}Controller"
+        controller_class = getattr(module, class_name, None)
+
+        if controller_class and inspect.isclass(controller_class):
+            # Instantiate the controller
+            controller = controller_class()
+            logger.info(f"Loaded controller: {module_name.lower()} -> {class_name}")
+            return controller
+        logger.warning(f"Class '{class_name}' not found or not a class in module '{full_module_path}'.")
+
+    except ImportError as e:
+        logger.error(f"Failed to import module '{full_module_path}': {e}")
+    except Exception as e:
+        logger.error(f"Error loading controller from '{full_module_path}': {e}")
+    return None
+
+def load_controller(module_name, reload=False):
+    """
+    Public entry point for loading a single controller, e.g. after its file changed.
+    Returns the controller instance, or None if it could not be loaded.
+    """
+    return _instantiate_controller(module_name, reload=reload)
 
-                if controller_class and inspect.isclass(controller_class):
-                    # Instantiate the controller and store it
-                    loaded_controllers[module_name.lower()] = controller_class()
-                    logger.info(f"Loaded controller: {module_name.lower()} -> {class_name}")
-                else:
-                    logger.warning(f"Class '{class_name}' not found or not a class in module '{full_module_path}'.")
+def scan_controllers(base_dir, manifest_path=None):
+    """
+    Builds a manifest mapping lowercase controller names to their module names by
+    scanning the filenames in 'controllers/' (nothing is imported).
+    If manifest_path is given, the manifest is cached there as JSON and reused for
+    as long as the controllers directory's mtime is unchanged.
+    """
+    controllers_path = os.path.join(base_dir, 'controllers')
+    try:
+        dir_mtime = os.stat(controllers_path).st_mtime_ns
+    except OSError:
+        logger.error(f"Controllers directory not found: {controllers_path}")
+        return {}
+
+    if manifest_path:
+        try:
+            with open(manifest_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('mtime') == dir_mtime:
+                return cached['controllers']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    manifest = {}
+    for filename in os.listdir(controllers_path):
+        if filename.endswith('.py') and filename != '__init__.py':
+            module_name = filename[:-3]
+            manifest[module_name.lower()] = module_name
 
-            except ImportError as e:
-                logger.error(f"Failed to import module '{full_module_path}': {e}")
-            except Exception as e:
-                logger.error(f"Error loading controller from '{full_module_path}': {e}")
+    if manifest_path:
+        try:
+            with open(manifest_path, 'w') as f:
+                json.dump({'mtime': dir_mtime, 'controllers': manifest}, f)
+        except OSError as e:
+            logger.warning(f"Could not write controller manifest '{manifest_path}': {e}")
+    return manifest
 
-    return loaded_controllers
+class LazyControllers:
+    """
+    Mapping of controller name -> controller instance that imports and
+    instantiates each controller the first time it is looked up. Iterating over it
+    (or 'in') only uses the manifest, so it never triggers an import. Assigning or
+    deleting a name (done by the reloader) updates both the manifest and the instance.
+    """
+    def __init__(self, manifest):
+        self.manifest = dict(manifest)
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.manifest
+
+    def __iter__(self):
+        return iter(self.manifest)
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def __getitem__(self, name):
+        controller = self.get(name)
+        if controller is None:
+            raise KeyError(name)
+        return controller
+
+    def __setitem__(self, name, controller):
+        with self._lock:
+            self.manifest[name] = type(controller).__module__.rsplit('.', 1)[-1]
+            self._instances[name] = controller
+
+    def __delitem__(self, name):
+        with self._lock:
+            del self.manifest[name]
+            self._instances.pop(name, None)
+
+    def get(self, name, default=None):
+        if name in self._instances:
+            return self._instances[name]
+        module_name = self.manifest.get(name)
+        if module_name is None:
+            return default
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = _instantiate_controller(module_name)
+        controller = self._instances[name]
+        return default if controller is None else controller
+
+    def keys(self):
+        return self.manifest.keys()
+
+    def items(self):
+        """
+        Imports every controller. Use loaded_items() to avoid that.
+        """
+        return [(name, self[name]) for name in self.manifest if self.get(name) is not None]
+
+    def loaded_items(self):
+        """
+        Controllers that have already been imported and instantiated.
+        """
+        return [(name, controller) for name, controller in self._instances.items() if controller is not None]
+
+    def preload(self):
+        """
+        Imports and instantiates every controller now, e.g. in the gunicorn master
+        (--preload) so forked workers share the work copy-on-write.
+        """
+        for name in self.manifest:
+            self.get(name)
 
 def load_models(base_dir):
     """
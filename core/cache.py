@@ -0,0 +1,450 @@
+# core/cache.py
+
+import os
+import json
+import time
+import stat
+import hashlib
+import logging
+import tempfile
+import inspect
+import threading
+import functools
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from core.router import Router
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """
+    In-process LRU store with per-entry expiry. Bounded both by number of entries
+    and by the total size of the cached values (len() of each value). Entries may
+    carry invalidation tags; the tag index lives with the entries, so a key leaves
+    it whenever its entry is evicted, expires or is deleted.
+    """
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value, size, tags)
+        self._tags = {}                # tag -> set of keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size, tags = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        size = len(value) if hasattr(value, '__len__') else 0
+        if size > self.max_bytes:
+            # Too large to cache, but the old value for key is stale now
+            self.delete(key)
+            return
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        tags = tuple(tags)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires_at, value, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def delete_tags(self, *tags):
+        """
+        Drops every entry stored with one of the given tags.
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._remove(key)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[2]
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class FileBackend:
+    """
+    Store shared by every process that points at the same directory, e.g. all
+    gunicorn workers. Put the directory on a tmpfs such as /dev/shm to keep it in
+    shared memory. Each entry is one file, written atomically with os.replace.
+
+    Values must be strings (rendered pages). An entry is a JSON header line holding
+    the key and expiry, followed by the value as UTF-8; nothing read back is ever
+    executed. The directory is created with mode 0700, and one that another user
+    owns or can write to is refused with PermissionError.
+    """
+    PRUNE_EVERY = 64  # Writes between two checks of the max_entries bound
+
+    def __init__(self, directory=None, max_entries=4096):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'mvc-cache')
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._check_directory()
+
+    def _check_directory(self):
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"Cache directory '{self.directory}' is not a directory")
+        if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+            raise PermissionError(f"Cache directory '{self.directory}' is owned by another user (uid {info.st_uid})")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Cache directory '{self.directory}' is writable by other users")
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    @staticmethod
+    def _read_header(f):
+        """
+        Returns (key, expires_at) from the first line of an entry file.
+        Raises ValueError when the file is not a valid entry.
+        """
+        stored_key, expires_at = json.loads(f.readline())
+        if not isinstance(stored_key, str) or not (expires_at is None or isinstance(expires_at, (int, float))):
+            raise ValueError("invalid cache entry header")
+        return stored_key, expires_at
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, expires_at = self._read_header(f)
+                if stored_key != key:
+                    return None
+                value = f.read().decode('utf-8')
+        except (OSError, ValueError):
+            return None
+        if expires_at is not None and expires_at <= time.time():
+            self._unlink(path)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        if not isinstance(value, str):
+            raise TypeError(f"FileBackend stores strings, not {type(value).__name__}")
+        expires_at = None if ttl is None else time.time() + ttl
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps([key, expires_at]).encode('utf-8') + b'\n')
+                f.write(value.encode('utf-8'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for '{key}': {e}")
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def delete(self, key):
+        self._unlink(self._path(key))
+
+    def keys(self):
+        keys = []
+        for path in self._entry_paths():
+            try:
+                with open(path, 'rb') as f:
+                    keys.append(self._read_header(f)[0])
+            except (OSError, ValueError):
+                continue
+        return keys
+
+    def clear(self):
+        for path in self._entry_paths():
+            self._unlink(path)
+
+    def _entry_paths(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in names if name.endswith('.cache')]
+
+    def _prune(self):
+        """
+        Evicts the least recently written entries once the directory holds too many.
+        """
+        paths = self._entry_paths()
+        if len(paths) <= self.max_entries:
+            return
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime
+            except OSError:
+                return 0
+        paths.sort(key=mtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            self._unlink(path)
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """
+    Full-page cache keyed by normalized path (e.g. '/', '/home' and '/home/index'
+    all share the key '/home/index'). Only routes that opt in with @cache_page
+    are stored.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(controller_name, method_name, args=()):
+        return '/' + '/'.join([controller_name, method_name, *args])
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def invalidate(self, path):
+        """
+        Drops one cached page, given either a normalized key or a request path.
+        """
+        controller_name, method_name, args = Router.split_path(path)
+        self.backend.delete(self.key_for(controller_name, method_name, args))
+
+    def invalidate_prefix(self, prefix):
+        """
+        Drops every cached page whose key starts with prefix, e.g. '/user/'.
+        """
+        for key in self.backend.keys():
+            if key.startswith(prefix):
+                self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def cache_page(ttl=60):
+    """
+    Decorator for controller methods whose rendered page is identical for every
+    visitor. The page is cached for ttl seconds (None means until invalidated).
+
+        @cache_page(ttl=300)
+        def index(self, render_template_func):
+            ...
+    """
+    def decorator(func):
+        func.cache_ttl = ttl
+        func.cache_page = True
+        return func
+    return decorator
+
+
+class QueryCache:
+    """
+    Process-wide cache for query and model results, keyed by function plus
+    arguments, with TTL/LRU eviction and tag-based invalidation. Cached values are
+    shared between callers, so treat them as read-only. The backend keeps the tags
+    (see MemoryBackend.delete_tags), so evicted entries do not linger in a tag index.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend(max_entries=4096, max_bytes=float('inf'))
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.backend.set(key, value, ttl, tags)
+
+    def invalidate_tags(self, *tags):
+        """
+        Drops every cached result that was stored with one of the given tags.
+        """
+        self.backend.delete_tags(*tags)
+
+    def clear(self):
+        self.backend.clear()
+
+
+# Per-request memo: a dict while a request is being handled, None otherwise
+_request_memo = contextvars.ContextVar('mvc_request_memo', default=None)
+
+
+@contextmanager
+def request_scope(memo=None):
+    """
+    Opens a request-scoped memo for @cached_query results. App wraps every request
+    in one, so repeated calls with the same arguments within a request run once.
+    Yields the memo dict; pass it back in to reopen the same request's memo, e.g.
+    around each chunk of a streamed page.
+    """
+    if memo is None:
+        memo = {}
+    token = _request_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _request_memo.reset(token)
+
+
+def request_memo():
+    """
+    Returns the current request's memo dict, or None outside of a request.
+    """
+    return _request_memo.get()
+
+
+_MISSING = object()
+
+
+def _instance_key(instance):
+    """
+    Identifies the instance a cached method was called on: its cache_key attribute
+    when it has one (instances with the same cache_key share entries), otherwise
+    the instance itself, so each instance gets entries of its own.
+    """
+    key = getattr(instance, 'cache_key', None)
+    if key is None:
+        return f"{type(instance).__qualname__}@{id(instance):x}"
+    return key
+
+
+def _call_key(name, is_method, args, kwargs):
+    if is_method and args:
+        return f"{name}[{_instance_key(args[0])}]:{args[1:]!r}:{sorted(kwargs.items())!r}"
+    return f"{name}:{args!r}:{sorted(kwargs.items())!r}"
+
+
+def _resolve_tags(signature, tags, args, kwargs):
+    """
+    Fills tag templates such as 'collection:{collection_name}' from the call's arguments.
+    """
+    if not tags:
+        return tags
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return [tag.format(**bound.arguments) for tag in tags]
+
+
+def cached_query(ttl=60, tags=(), request_only=False):
+    """
+    Decorator for model methods (or any function) whose result depends only on
+    their arguments. Results are memoized for the current request and, unless
+    request_only is True, cached process-wide for ttl seconds.
+
+    tags are invalidation tags; they may refer to arguments by name:
+
+        @cached_query(ttl=300, tags=('collection:{collection_name}',))
+        def get_data(self, collection_name):
+            ...
+
+        query_cache.invalidate_tags('collection:home_page_data')
+
+    For methods, the instance is part of the key: its cache_key attribute if it
+    has one, so instances that read the same data (e.g. two Database objects on
+    the same DSN) share entries, and the instance itself otherwise.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        is_method = next(iter(signature.parameters), None) == 'self'
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _call_key(name, is_method, args, kwargs)
+
+            memo = _request_memo.get()
+            if memo is not None:
+                value = memo.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+
+            value = None if request_only else query_cache.get(key)
+            if value is None:
+                value = func(*args, **kwargs)
+                if not request_only and value is not None:
+                    query_cache.set(key, value, ttl, _resolve_tags(signature, tags, args, kwargs))
+
+            if memo is not None:
+                memo[key] = value
+            return value
+
+        wrapper.cache_key_prefix = name
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(*tags):
+    """
+    Drops everything stored with one of the given tags from the query cache, e.g.
+    after the data behind them was written.
+    """
+    query_cache.invalidate_tags(*tags)
+
+
+def _default_backend():
+    """
+    Uses the shared FileBackend when MVC_RESPONSE_CACHE_DIR is set (e.g. /dev/shm/mvc-cache),
+    otherwise an in-process MemoryBackend.
+    """
+    directory = os.environ.get('MVC_RESPONSE_CACHE_DIR')
+    if directory:
+        return FileBackend(directory)
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(_default_backend())
+query_cache = QueryCache()
@@ -0,0 +1,250 @@
+# core/compression.py
+# Build step: python -m core.compression [--static static] [--output build/compressed]
+
+import os
+import sys
+import gzip
+import zlib
+import logging
+import argparse
+
+from core.cache import MemoryBackend
+from core.conditional import compute_etag
+from core.template import TemplateCache
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Bodies smaller than this are sent as-is; the headers would eat most of the saving
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Per-request compression favours speed, the build step favours size
+RUNTIME_LEVELS = {'gzip': 6, 'br': 5}
+BUILD_LEVELS = {'gzip': 9, 'br': 11}
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+# Static asset extensions precompressed by the build step
+STATIC_EXTENSIONS = ('.html', '.css', '.js', '.mjs', '.json', '.svg', '.txt', '.xml', '.map')
+
+
+def compress(data, encoding, level=None):
+    """
+    Compresses bytes with 'gzip' or 'br'.
+    """
+    if encoding == 'gzip':
+        # mtime=0 keeps the output (and so the cached bytes) deterministic
+        return gzip.compress(data, compresslevel=level or RUNTIME_LEVELS['gzip'], mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=level or RUNTIME_LEVELS['br'])
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresses an iterator of bytes chunks on the fly. Every chunk is flushed, so
+    streamed pages still reach the client piece by piece.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=RUNTIME_LEVELS['br'])
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    # wbits 31 = zlib deflate with a gzip header and trailer
+    compressor = zlib.compressobj(RUNTIME_LEVELS['gzip'], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def negotiate(accept_encoding):
+    """
+    Picks the content encoding for an Accept-Encoding header value, honouring
+    q-values (q=0 refuses an encoding). Returns None when the body should be sent
+    uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name] = q
+    wildcard = qualities.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type):
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressedCache:
+    """
+    Compressed bodies keyed by content hash and encoding, so a page that renders to
+    the same bytes again (page-cache hits, unchanged data) is compressed only once.
+    Precompressed output from the build step can be loaded in, so fully static
+    views are served at the highest compression level from the first request.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend(max_entries=4096, max_bytes=32 * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(etag, encoding):
+        if etag.startswith('W/'):
+            etag = etag[2:]
+        return etag.strip('"') + ':' + encoding
+
+    def get_or_compress(self, etag, data, encoding):
+        """
+        Returns data compressed with encoding, where etag is the content hash of data
+        (see core.conditional.compute_etag).
+        """
+        key = self.key_for(etag, encoding)
+        compressed = self.backend.get(key)
+        if compressed is not None:
+            self.hits += 1
+            return compressed
+        self.misses += 1
+        compressed = compress(data, encoding)
+        self.backend.set(key, compressed)
+        return compressed
+
+    def load(self, directory):
+        """
+        Loads precompressed bodies written by the build step (<hash>.gz / <hash>.br).
+        Returns the number of files loaded.
+        """
+        loaded = 0
+        extensions = {suffix: encoding for encoding, suffix in SUFFIXES.items() if encoding in ENCODINGS}
+        for name in os.listdir(directory):
+            content_hash, extension = os.path.splitext(name)
+            encoding = extensions.get(extension)
+            if encoding is None:
+                continue
+            with open(os.path.join(directory, name), 'rb') as f:
+                self.backend.set(self.key_for(content_hash, encoding), f.read())
+            loaded += 1
+        logger.info(f"Loaded {loaded} precompressed bodies from '{directory}'.")
+        return loaded
+
+    def clear(self):
+        self.backend.clear()
+
+
+def precompress_file(path, encodings=None):
+    """
+    Writes path.gz (and path.br) next to a static asset, for nginx's gzip_static /
+    brotli_static. Skips files whose compressed copies are already up to date.
+    Returns the number of files written.
+    """
+    written = 0
+    mtime = os.stat(path).st_mtime_ns
+    data = None
+    for encoding in encodings or ENCODINGS:
+        target = path + SUFFIXES[encoding]
+        try:
+            if os.stat(target).st_mtime_ns >= mtime:
+                continue
+        except OSError:
+            pass
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        with open(target, 'wb') as f:
+            f.write(compress(data, encoding, BUILD_LEVELS[encoding]))
+        written += 1
+    return written
+
+
+def precompress_static(static_dir):
+    """
+    Precompresses every compressible asset under static_dir. Returns the number of
+    compressed files written.
+    """
+    written = 0
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if name.endswith(STATIC_EXTENSIONS):
+                path = os.path.join(root, name)
+                if os.path.getsize(path) >= MIN_SIZE:
+                    written += precompress_file(path)
+    return written
+
+
+def precompress_views(views_dir, output_dir):
+    """
+    Compiles every view and precompresses the ones that are fully static (no
+    placeholder slots, once partials are included) into output_dir as
+    <content hash>.<gz|br>, ready for CompressedCache.load().
+    Returns the view paths that were precompressed.
+    """
+    templates = TemplateCache(views_dir, frozen=True)
+    os.makedirs(output_dir, exist_ok=True)
+    static_views = []
+    for view_path in templates.view_paths():
+        template = templates.get(view_path)
+        if template.slots:
+            continue
+        data = template.render({}).encode('utf-8')
+        if len(data) < MIN_SIZE:
+            continue
+        content_hash = compute_etag(data).strip('"')
+        for encoding in ENCODINGS:
+            with open(os.path.join(output_dir, content_hash + SUFFIXES[encoding]), 'wb') as f:
+                f.write(compress(data, encoding, BUILD_LEVELS[encoding]))
+        static_views.append(view_path)
+    return static_views
+
+
+compressed_cache = CompressedCache()
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Precompress static assets and fully static views.")
+    parser.add_argument('--static', default=os.path.join(base_dir, 'static'), help="Static asset directory (default: static/)")
+    parser.add_argument('--views', default=os.path.join(base_dir, 'views'), help="Views directory (default: views/)")
+    parser.add_argument('--output', default=os.path.join(base_dir, 'build', 'compressed'),
+                        help="Where precompressed views are written; serve with MVC_PRECOMPRESSED_DIR (default: build/compressed)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if brotli is None:
+        logger.warning("brotli is not installed; writing gzip output only.")
+    if os.path.isdir(args.static):
+        logger.info(f"Wrote {precompress_static(args.static)} precompressed static files under '{args.static}'.")
+    static_views = precompress_views(args.views, args.output)
+    logger.info(f"Precompressed {len(static_views)} static views into '{args.output}': {', '.join(static_views) or 'none'}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
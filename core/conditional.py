@@ -0,0 +1,49 @@
+# core/conditional.py
+
+import hashlib
+
+
+def compute_etag(body):
+    """
+    Returns a strong ETag for a rendered body: a quoted content hash.
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Checks an If-None-Match header value against an ETag. Weak validators
+    (W/"...") compare equal to their strong form, as required for GET/HEAD.
+    """
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(headers, etag):
+    """
+    Decides whether a conditional GET/HEAD can be answered with 304 Not Modified.
+    headers is any mapping with .get() (e.g. flask.request.headers or a WSGI-derived dict).
+
+    Only If-None-Match is honoured: pages carry no Last-Modified date, since nothing
+    behind a rendered page (view files and database rows alike) yields one that all
+    workers agree on, and a date made up per process would send a different
+    validator for the same ETag from every worker.
+    """
+    if_none_match = headers.get('If-None-Match')
+    return bool(if_none_match) and etag_matches(if_none_match, etag)
+
+
+def conditional_headers(etag):
+    """
+    Validator headers sent with both 200 and 304 responses.
+    """
+    return {'ETag': etag}
@@ -1,110 +1,529 @@
-from rich.console import Console
-from rich.table import Table
-from rich.text import Text
-from rich import box
+import io
+import json
+import html
 import types
+import contextvars
 import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
 
-console = Console()
+try:
+    from rich.console import Console
+    from rich.table import Table
+    from rich import box
+    from rich.markup import escape
+    console = Console()
+except ImportError:  # Optional: without rich, dumps are printed as indented plain text
+    console = None
 
-class dBug:
-    def __init__(self, var, force_type=None, collapsed=False):
-        self.visited = set()
-        self.collapsed = collapsed
-        self.force_type = force_type
-        if force_type == 'array':
-            self.var_is_array(var)
-        elif force_type == 'object':
-            self.var_is_object(var)
-        elif force_type == 'xml':
-            self.var_is_xml(var)
+# Default limits of one dump. Anything beyond them is summarized, not expanded.
+MAX_DEPTH = 8        # Nesting levels expanded below the dumped value
+MAX_ITEMS = 100      # Entries shown per container (and methods listed per object)
+MAX_STRING = 500     # Characters shown per string/bytes value
+
+CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+
+# dBug() calls made while a debug panel is open are collected here instead of printed
+_panel = contextvars.ContextVar('mvc_debug_panel', default=None)
+
+
+def _plain(segments):
+    return ''.join(text for text, style in segments)
+
+
+def _print(segments):
+    """
+    Prints one line given as (text, style) segments, style being a Rich style or
+    None. The text is data (tags, attribute values, ...), so it is escaped rather
+    than parsed as Rich markup.
+    """
+    if console is not None:
+        console.print(''.join(
+            escape(text) if style is None else f"[{style}]{escape(text)}[/{style}]"
+            for text, style in segments
+        ))
+    else:
+        print(_plain(segments))
+
+
+def _clip(text, max_string):
+    if len(text) > max_string:
+        return text[:max_string] + '…', True
+    return text, False
+
+
+def _scalar(value, max_string):
+    """
+    Node for a value that is not expanded: None, bools, numbers, strings, and
+    anything else shown by its (clipped) repr.
+    """
+    if value is None:
+        return {'type': 'NoneType', 'value': 'NULL'}
+    if isinstance(value, bool):
+        return {'type': 'bool', 'value': 'TRUE' if value else 'FALSE'}
+    if isinstance(value, (str, bytes)):
+        clipped, truncated = _clip(value, max_string)
+        node = {'type': type(value).__name__, 'value': repr(clipped), 'length': len(value)}
+        if truncated:
+            node['truncated'] = True
+        return node
+    try:
+        text = repr(value)
+    except Exception as e:
+        text = f"<repr failed: {type(e).__name__}>"
+    clipped, truncated = _clip(text, max_string)
+    node = {'type': type(value).__name__, 'value': clipped}
+    if truncated:
+        node['truncated'] = True
+    return node
+
+
+def _object_members(value):
+    """
+    Attributes from the instance __dict__/__slots__, and the methods and properties
+    defined on its class. Properties are listed, never evaluated, so dumping an
+    object cannot trigger expensive (or side-effecting) getters.
+    """
+    attributes = dict(getattr(value, '__dict__', None) or {})
+    methods = []
+    properties = []
+    for cls in type(value).__mro__:
+        if cls is object:
+            continue
+        for name, member in vars(cls).items():
+            if isinstance(member, (types.FunctionType, classmethod, staticmethod)):
+                methods.append(name)
+            elif isinstance(member, property):
+                properties.append(name)
+            elif isinstance(member, types.MemberDescriptorType) and name not in attributes:
+                try:
+                    attributes[name] = member.__get__(value, cls)
+                except AttributeError:
+                    pass
+    return attributes, sorted(set(methods)), sorted(set(properties))
+
+
+def _has_attributes(value):
+    """
+    True for instances with their own state: a __dict__, or slots declared by their
+    class or one of its bases.
+    """
+    if hasattr(value, '__dict__'):
+        return True
+    return any(vars(cls).get('__slots__') for cls in type(value).__mro__)
+
+
+def _sample_indices(length, limit):
+    """
+    limit indices spread evenly over a sequence, always including the first and last.
+    """
+    if limit <= 1:
+        return [0][:limit]
+    step = (length - 1) / (limit - 1)
+    return sorted({round(i * step) for i in range(limit)})
+
+
+def _children(value, node, max_items, sample):
+    """
+    Yields (key, child value) for at most max_items entries of a container and
+    records in node how many were left out. Long sequences are sampled evenly when
+    sample is True, otherwise their head is shown.
+    """
+    length = len(value)
+    node['length'] = length
+    if length > max_items:
+        node['omitted'] = length - max_items
+    if isinstance(value, dict):
+        return islice(value.items(), max_items)
+    if isinstance(value, (set, frozenset)):
+        return enumerate(islice(value, max_items))
+    if sample and length > max_items:
+        node['sampled'] = True
+        return ((i, value[i]) for i in _sample_indices(length, max_items))
+    return enumerate(islice(value, max_items))
+
+
+def inspect_var(var, force_type=None, max_depth=MAX_DEPTH, max_items=MAX_ITEMS, max_string=MAX_STRING, sample=True):
+    """
+    Walks var iteratively (breadth first, so no Python recursion however deep it is)
+    and returns a tree of plain dicts that renderers turn into console, HTML or JSON
+    output. One visited map is shared by the whole walk: a container or object met a
+    second time (a cycle, or a shared reference) is shown as a reference to the path
+    where it was first expanded.
+    """
+    root = {}
+    visited = {}  # id -> path of the first occurrence
+    queue = deque([(var, root, 'var', 0, force_type)])
+    while queue:
+        value, node, path, depth, forced = queue.popleft()
+
+        if forced == 'array' and not isinstance(value, CONTAINER_TYPES):
+            value = _object_members(value)[0]
+        if forced == 'object' or (forced is None and not isinstance(value, CONTAINER_TYPES) and _has_attributes(value)
+                                  and not isinstance(value, (type, types.ModuleType, types.FunctionType, types.MethodType))):
+            kind = 'object'
+        elif isinstance(value, CONTAINER_TYPES):
+            kind = 'array'
         else:
-            self.check_type(var)
-
-    def check_type(self, var):
-        if var is None:
-            console.print("[bold red]NULL[/bold red]")
-        elif isinstance(var, bool):
-            console.print(f"[bold magenta]{'TRUE' if var else 'FALSE'}[/bold magenta]")
-        elif isinstance(var, (int, float, str)):
-            console.print(repr(var))
-        elif isinstance(var, dict):
-            self.var_is_array(var)
-        elif isinstance(var, (list, tuple, set)):
-            self.var_is_array({i: v for i, v in enumerate(var)})
-        elif hasattr(var, '__dict__'):
-            self.var_is_object(var)
+            node.update(_scalar(value, max_string))
+            continue
+
+        node['type'] = type(value).__name__
+        node['kind'] = kind
+        first_path = visited.get(id(value))
+        if first_path is not None:
+            node['ref'] = first_path
+            continue
+        visited[id(value)] = path
+
+        if kind == 'object':
+            attributes, methods, properties = _object_members(value)
+            node['methods'] = methods[:max_items]
+            if properties:
+                node['properties'] = properties[:max_items]
+            entries = _children(attributes, node, max_items, sample)
         else:
-            console.print(f"[bold red]Unsupported type: {type(var).__name__}[/bold red]")
+            entries = _children(value, node, max_items, sample)
 
-    def var_is_array(self, var):
-        table = Table(show_header=True, header_style="bold green", box=box.MINIMAL_DOUBLE_HEAD)
-        table.add_column("Key")
-        table.add_column("Value")
-        id_var = id(var)
+        if depth >= max_depth:
+            # Depth limit: summarized (type and size) instead of expanded
+            node['collapsed'] = True
+            node.pop('methods', None)
+            node.pop('properties', None)
+            continue
+        items = node['items'] = []
+        for key, child_value in entries:
+            child = {}
+            key_text = _clip(str(key), max_string)[0]
+            items.append([key_text, child])
+            child_path = f"{path}.{key}" if kind == 'object' else f"{path}[{key!r}]"
+            queue.append((child_value, child, child_path, depth + 1, None))
+    return root
 
-        if id_var in self.visited:
-            table.add_row("*RECURSION*", "")
-            console.print(table)
-            return
 
-        self.visited.add(id_var)
+def _summary(node):
+    text = node['type']
+    if 'length' in node:
+        text += f" ({node['length']} items"
+        if node.get('omitted'):
+            text += f", {node['omitted']} not shown" + (", sampled" if node.get('sampled') else "")
+        text += ")"
+    if 'ref' in node:
+        text += f" *RECURSION* → {node['ref']}"
+    elif node.get('collapsed'):
+        text += " [Nested]"
+    return text
 
-        for key, value in var.items():
-            if isinstance(value, (dict, list, tuple, set)):
-                sub_table = dBug(value)
-                table.add_row(str(key), "[Nested]")
-            else:
-                table.add_row(str(key), repr(value))
 
-        console.print(table)
+def render_json(node, indent=None):
+    """
+    Serializes an inspect_var() tree to JSON, e.g. for a debug panel or an API.
+    """
+    return json.dumps(node, indent=indent, ensure_ascii=False)
 
-    def var_is_object(self, var):
-        table = Table(show_header=True, header_style="bold blue", box=box.MINIMAL_DOUBLE_HEAD)
-        table.add_column("Attribute")
-        table.add_column("Value")
 
-        id_var = id(var)
-        if id_var in self.visited:
-            table.add_row("*RECURSION*", "")
-            console.print(table)
-            return
+def render_html(node, open_levels=1):
+    """
+    Renders an inspect_var() tree as nested <details> elements. Only the first
+    open_levels levels start expanded; the rest expand on click in the browser.
+    """
+    if 'kind' not in node:
+        return f'<span class="dbug-{html.escape(node["type"])}">{html.escape(node["value"])}</span>'
+    summary = html.escape(_summary(node))
+    if 'items' not in node:
+        return f'<span class="dbug-summary">{summary}</span>'
+    rows = ''.join(
+        f'<tr><th>{html.escape(key)}</th><td>{render_html(child, open_levels - 1)}</td></tr>'
+        for key, child in node['items']
+    )
+    for name in node.get('properties', ()):
+        rows += f'<tr><th>{html.escape(name)}</th><td><em>[property]</em></td></tr>'
+    for name in node.get('methods', ()):
+        rows += f'<tr><th>{html.escape(name)}</th><td><em>[method]</em></td></tr>'
+    is_open = ' open' if open_levels > 0 else ''
+    return f'<details class="dbug-{node["kind"]}"{is_open}><summary>{summary}</summary><table>{rows}</table></details>'
 
-        self.visited.add(id_var)
 
-        for attr, value in vars(var).items():
-            if isinstance(value, (dict, list, tuple, set)):
-                dBug(value)
-                table.add_row(attr, "[Nested]")
-            else:
-                table.add_row(attr, repr(value))
+def render_text(node, indent=0):
+    """
+    Renders an inspect_var() tree as indented plain text lines.
+    """
+    pad = '  ' * indent
+    if 'kind' not in node:
+        return [f"{pad}{node['value']}"]
+    lines = [f"{pad}{_summary(node)}"]
+    for key, child in node.get('items', ()):
+        if 'kind' in child:
+            lines.append(f"{pad}  {key}:")
+            lines.extend(render_text(child, indent + 2))
+        else:
+            lines.append(f"{pad}  {key}: {child['value']}")
+    for name in node.get('properties', ()):
+        lines.append(f"{pad}  {name}: [property]")
+    for name in node.get('methods', ()):
+        lines.append(f"{pad}  {name}: [method]")
+    return lines
 
-        methods = [m for m in dir(var) if isinstance(getattr(var, m), types.MethodType)]
-        for method in methods:
-            table.add_row(method, "[method]")
 
-        console.print(table)
+def _rich_renderable(node):
+    if 'kind' not in node:
+        if node['type'] == 'NoneType':
+            return "[bold red]NULL[/bold red]"
+        if node['type'] == 'bool':
+            return f"[bold magenta]{node['value']}[/bold magenta]"
+        return escape(node['value'])
+    if 'items' not in node:
+        return escape(_summary(node))
+    is_object = node['kind'] == 'object'
+    table = Table(
+        title=escape(_summary(node)), show_header=True, box=box.MINIMAL_DOUBLE_HEAD,
+        header_style="bold blue" if is_object else "bold green",
+    )
+    table.add_column("Attribute" if is_object else "Key")
+    table.add_column("Value")
+    for key, child in node['items']:
+        table.add_row(escape(key), _rich_renderable(child))
+    for name in node.get('properties', ()):
+        table.add_row(name, r"\[property]")
+    for name in node.get('methods', ()):
+        table.add_row(name, r"\[method]")
+    return table
 
-    def var_is_xml(self, var):
-        try:
-            if isinstance(var, str) and var.strip().startswith("<"):
-                root = ET.fromstring(var)
-            else:
-                root = ET.parse(var).getroot()
-        except Exception as e:
-            console.print(f"[bold red]XML parsing error:[/bold red] {e}")
+
+# Distinct values tracked per attribute for XmlStats; beyond it the count is reported as a lower bound
+MAX_CARDINALITY = 1000
+
+
+class XmlStats:
+    """
+    Summary statistics gathered while an XML document is streamed: element count,
+    count per tag, maximum depth and the number of distinct values per attribute
+    (tracked up to MAX_CARDINALITY values each, so memory stays bounded).
+    """
+    def __init__(self):
+        self.elements = 0
+        self.matched = 0
+        self.shown = 0
+        self.max_depth = 0
+        self.tags = {}
+        self.attribute_values = {}  # 'tag@name' -> set of values
+        self.saturated = set()      # 'tag@name' keys that reached MAX_CARDINALITY
+
+    def add(self, tag, attrib, depth):
+        self.elements += 1
+        self.tags[tag] = self.tags.get(tag, 0) + 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        for name, value in attrib.items():
+            key = f"{tag}@{name}"
+            values = self.attribute_values.setdefault(key, set())
+            if len(values) < MAX_CARDINALITY:
+                values.add(value)
+            elif value not in values:
+                self.saturated.add(key)
+
+    def summary(self):
+        return {
+            'elements': self.elements,
+            'matched': self.matched,
+            'shown': self.shown,
+            'max_depth': self.max_depth,
+            'tags': dict(sorted(self.tags.items(), key=lambda item: -item[1])),
+            'attributes': {
+                key: f">{MAX_CARDINALITY}" if key in self.saturated else len(values)
+                for key, values in sorted(self.attribute_values.items())
+            },
+        }
+
+
+def _path_matcher(xml_path):
+    """
+    Compiles a path filter into a predicate over the list of tags from the root:
+    'feed/entry' matches from the root, '//entry' or '//entry/title' at any depth,
+    and '*' matches any single tag.
+    """
+    anywhere = xml_path.startswith('//')
+    segments = [segment for segment in xml_path.strip('/').split('/') if segment]
+
+    def matches(tags):
+        if anywhere:
+            if len(tags) < len(segments):
+                return False
+            tags = tags[len(tags) - len(segments):]
+        elif len(tags) != len(segments):
+            return False
+        return all(segment in ('*', tag) for segment, tag in zip(segments, tags))
+    return matches
+
+
+def iter_xml(source, xml_path=None, max_elements=MAX_ITEMS, max_depth=MAX_DEPTH, max_string=MAX_STRING, max_scan=None, stats=None):
+    """
+    Streams an XML document with ET.iterparse and yields (depth, tag, attrib, text)
+    for the elements to show, in document order. Every element is cleared and
+    detached from its parent once it has been parsed, so memory stays constant
+    however large the document is.
+
+    xml_path restricts the output to matching elements and their descendants (see
+    _path_matcher); depth is counted from the root, or from the matched element.
+    At most max_elements elements are shown, each at most max_depth levels deep.
+    Statistics cover the whole document and are added to stats (an XmlStats);
+    parsing stops early after max_scan elements when it is set.
+    """
+    if isinstance(source, str) and source.lstrip().startswith('<'):
+        source = io.StringIO(source)
+    elif isinstance(source, bytes):
+        source = io.BytesIO(source)
+    matches = _path_matcher(xml_path) if xml_path else None
+    stats = stats if stats is not None else XmlStats()
+
+    elements = []  # Open elements, root first
+    tags = []
+    shown_from = []  # Per open element: depth of the matched ancestor it is shown under, or None
+    pending = None   # Shown element whose text is not complete until its first child or its end
+
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if pending is not None:
+                yield _xml_entry(*pending, max_string)
+                pending = None
+            depth = len(elements)
+            elements.append(elem)
+            tags.append(elem.tag)
+            stats.add(elem.tag, elem.attrib, depth)
+
+            base = shown_from[-1] if shown_from else None
+            if base is None and (matches is None or matches(tags)):
+                base = depth
+                stats.matched += 1
+            shown_from.append(base)
+            if base is not None and depth - base <= max_depth and stats.shown < max_elements:
+                stats.shown += 1
+                pending = (depth - base, elem)
+            if max_scan is not None and stats.elements >= max_scan:
+                break
+        else:
+            if pending is not None and pending[1] is elem:
+                yield _xml_entry(*pending, max_string)
+                pending = None
+            elements.pop()
+            tags.pop()
+            shown_from.pop()
+            elem.clear()
+            if elements:
+                # Detach the finished child, or the root would keep one empty element per child
+                elements[-1].remove(elem)
+    if pending is not None:
+        yield _xml_entry(*pending, max_string)
+
+
+def _xml_entry(depth, elem, max_string):
+    text = (elem.text or '').strip()
+    return depth, elem.tag, dict(elem.attrib), _clip(text, max_string)[0]
+
+
+@contextmanager
+def debug_panel():
+    """
+    Collects the dBug() calls made inside the block, e.g. while one request is
+    handled, instead of printing them. Yields the list of (label, tree) entries;
+    render_panel() turns it into HTML.
+    """
+    entries = []
+    token = _panel.set(entries)
+    try:
+        yield entries
+    finally:
+        _panel.reset(token)
+
+
+def render_panel(entries):
+    """
+    Debug panel for the bottom of an HTML page: every entry as collapsible HTML,
+    plus the raw trees as JSON in a <script type="application/json"> block.
+    """
+    sections = ''.join(
+        f'<section><h4>{html.escape(label)}</h4>{render_html(tree)}</section>'
+        for label, tree in entries
+    )
+    data = render_json([[label, tree] for label, tree in entries]).replace('</', '<\\/')
+    return (
+        '<div id="mvc-debug-panel" style="font:12px monospace;border-top:2px solid #c33;padding:8px;background:#fff">'
+        f'<h3>Debug</h3>{sections}'
+        f'<script type="application/json" id="mvc-debug-data">{data}</script>'
+        '</div>'
+    )
+
+
+class dBug:
+    """
+    Dumps a variable. Inside debug_panel() the dump is added to the panel; otherwise
+    it is printed to the console (as Rich tables when rich is installed). The tree is
+    kept in self.node and can also be rendered with to_html() / to_json().
+    """
+    def __init__(self, var, force_type=None, collapsed=False, label=None,
+                 max_depth=MAX_DEPTH, max_items=MAX_ITEMS, max_string=MAX_STRING, sample=True, xml_path=None):
+        self.collapsed = collapsed
+        self.force_type = force_type
+        self.node = None
+        if force_type == 'xml':
+            self.var_is_xml(var, xml_path=xml_path, max_elements=max_items, max_depth=max_depth, max_string=max_string)
             return
+        self.node = inspect_var(
+            var, force_type=force_type, max_depth=1 if collapsed else max_depth,
+            max_items=max_items, max_string=max_string, sample=sample,
+        )
+        entries = _panel.get()
+        if entries is not None:
+            entries.append((label or self.node['type'], self.node))
+        else:
+            self.print()
+
+    def print(self):
+        if console is not None:
+            console.print(_rich_renderable(self.node))
+        else:
+            print('\n'.join(render_text(self.node)))
 
-        def recurse_xml(elem, depth=0):
-            pad = "  " * depth
-            console.print(f"{pad}[bold yellow]<{elem.tag}>[/bold yellow]")
-            if elem.attrib:
-                for k, v in elem.attrib.items():
-                    console.print(f"{pad}  [cyan]{k}[/cyan] = {v}")
-            if elem.text and elem.text.strip():
-                console.print(f"{pad}  [white]{elem.text.strip()}[/white]")
-            for child in elem:
-                recurse_xml(child, depth + 1)
+    def to_html(self):
+        return render_html(self.node, open_levels=0 if self.collapsed else 1)
 
-        recurse_xml(root)
+    def to_json(self, indent=None):
+        return render_json(self.node, indent)
 
+    def var_is_xml(self, var, xml_path=None, max_elements=MAX_ITEMS, max_depth=MAX_DEPTH, max_string=MAX_STRING, max_scan=None):
+        """
+        Streams an XML document (a string, bytes, a file path or a file object) in
+        constant memory: elements are shown as they are parsed, then summary statistics.
+        See iter_xml() for the filter and limits.
+        """
+        stats = XmlStats()
+        entries = _panel.get()
+        lines = [] if entries is not None else None
+        emit = lines.append if lines is not None else _print
+        try:
+            for depth, tag, attrib, text in iter_xml(var, xml_path, max_elements, max_depth, max_string, max_scan, stats):
+                pad = "  " * depth
+                emit([(pad, None), (f"<{tag}>", 'bold yellow')])
+                for k, v in attrib.items():
+                    emit([(pad + "  ", None), (k, 'cyan'), (f" = {v}", None)])
+                if text:
+                    emit([(pad + "  ", None), (text, 'white')])
+        except (ET.ParseError, OSError) as e:
+            emit([("XML parsing error:", 'bold red'), (f" {e}", None)])
+
+        summary = stats.summary()
+        if lines is not None:
+            lines = [_plain(line) for line in lines]
+            self.node = inspect_var({'elements': lines, 'summary': summary}, max_items=max(len(lines), MAX_ITEMS))
+            entries.append(('xml', self.node))
+            return
+        self.node = inspect_var({'summary': summary})
+        _print([
+            (f"{summary['elements']} elements", 'bold green'),
+            (f" ({summary['shown']} shown, {summary['matched']} matched), max depth {summary['max_depth']}", None),
+        ])
+        for tag, count in summary['tags'].items():
+            _print([("  ", None), (tag, 'yellow'), (f": {count}", None)])
+        for attribute, cardinality in summary['attributes'].items():
+            _print([("  ", None), (attribute, 'cyan'), (f": {cardinality} distinct values", None)])
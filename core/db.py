@@ -1,16 +1,418 @@
 # core/db.py
 
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from core.cache import cached_query, invalidate_tags
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection could be checked out of the pool within the timeout.
+    """
+
+
+class Driver:
+    """
+    Interface between the connection pool and a database library. To add another
+    database, subclass Driver, implement connect(), and register it with
+    register_driver('name', MyDriver) so it can be selected with MVC_DB_DRIVER.
+
+    cache_key names the database the driver connects to (e.g. its DSN without the
+    password). Database objects whose drivers share a cache_key share @cached_query
+    results; with None, each Database keeps its own.
+    """
+    cache_key = None
+
+    def connect(self):
+        raise NotImplementedError
+
+    def ping(self, conn):
+        """
+        Returns True if a pooled connection is still usable.
+        """
+        return True
+
+    def reset(self, conn):
+        """
+        Called when a connection goes back to the pool: discard any open transaction.
+        """
+        conn.rollback()
+
+    def close(self, conn):
+        conn.close()
+
+
+class SQLiteDriver(Driver):
+    """
+    SQLite driver. With no path, every connection in the process shares one
+    named in-memory database, kept alive by a connection the driver holds outside
+    the pool: even if the pool discards every connection, the data survives.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self._keepalive = None
+        self._keepalive_pid = None
+
+    @property
+    def cache_key(self):
+        if self.path:
+            return f"sqlite:{os.path.abspath(self.path)}"
+        return f"sqlite:memory:{os.getpid()}"
+
+    def connect(self):
+        if self.path:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+        else:
+            # Unique per process, so forked workers never share an in-memory database by accident
+            uri = f"file:mvc-{os.getpid()}?mode=memory&cache=shared"
+            if self._keepalive_pid != os.getpid():
+                self._keepalive = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                self._keepalive_pid = os.getpid()
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ping(self, conn):
+        try:
+            conn.execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+
+DRIVERS = {
+    'sqlite': SQLiteDriver,
+}
+
+
+def register_driver(name, driver_class):
+    DRIVERS[name] = driver_class
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections with a min/max size and a checkout
+    timeout. Connections are opened lazily, and the pool notices when it is used
+    in a forked process (e.g. a gunicorn worker after --preload): connections
+    inherited from the parent are dropped rather than shared.
+    """
+    def __init__(self, driver, min_size=1, max_size=10, timeout=5.0):
+        self.driver = driver
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._size = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Never close the parent's connections from the child; just forget them
+            logger.info(f"Connection pool used in new process {os.getpid()}, starting a fresh pool.")
+            self._lock = threading.Condition()
+            self._reset_state()
+
+    def _fill(self):
+        while self._size < self.min_size:
+            self._idle.append(self.driver.connect())
+            self._size += 1
+
+    def acquire(self, timeout=None):
+        """
+        Checks a connection out of the pool, opening a new one if the pool is below
+        max_size. Waits up to timeout seconds for one to be released, then raises PoolTimeout.
+        """
+        self._check_fork()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._fill()
+            while True:
+                while self._idle:
+                    conn = self._idle.popleft()
+                    if self.driver.ping(conn):
+                        return conn
+                    self._discard(conn)
+                if self._size < self.max_size:
+                    conn = self.driver.connect()
+                    self._size += 1
+                    return conn
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection available after {timeout}s (max_size={self.max_size}).")
+                self._lock.wait(remaining)
+
+    def release(self, conn):
+        """
+        Returns a connection to the pool.
+        """
+        if self._pid != os.getpid():
+            return  # Checked out before a fork; it belongs to the parent
+        try:
+            self.driver.reset(conn)
+        except Exception as e:
+            logger.warning(f"Discarding database connection that failed to reset: {e}")
+            with self._lock:
+                self._discard(conn)
+                self._lock.notify()
+            return
+        with self._lock:
+            self._idle.append(conn)
+            self._lock.notify()
+
+    def _discard(self, conn):
+        self._size -= 1
+        try:
+            self.driver.close(conn)
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        with self._lock:
+            while self._idle:
+                self._discard(self._idle.popleft())
+
+    def stats(self):
+        return {'size': self._size, 'idle': len(self._idle), 'min_size': self.min_size, 'max_size': self.max_size}
+
+
+# One statement per entry: DB-API drivers run a single statement per execute()
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS collections (
+        name TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL
+    )
+    """,
+)
+
+# Initial content of the collections table
+SEED_COLLECTIONS = {
+    "home_page_data": {
+        "title": "Welcome to My MVC App!",
+        "message": "This is a simple demonstration of the MVC pattern in Python.",
+        "items": ["Item 1", "Item 2", "Item 3"]
+    },
+    "user_page_data": {
+        "title": "User List",
+        "message": "Welcome to the user management section!",
+        "items": ["Alice Smith", "Bob Johnson", "Charlie Brown"]
+    },
+}
+
+SEED_USERS = [
+    (1, "Alice Smith", "alice@example.com"),
+    (2, "Bob Johnson", "bob@example.com"),
+    (3, "Charlie Brown", "charlie@example.com"),
+]
+
+# Keys per IN (...) clause; SQLite allows at most 999 parameters per statement
+MAX_BATCH_SIZE = 500
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+@lru_cache(maxsize=256)
+def row_class(columns):
+    """
+    Returns the Row class for a tuple of column names: a namedtuple, so rows are
+    compact (no per-row dict) and support both row.name and row[0].
+    """
+    return namedtuple('Row', columns, rename=True)
+
+
+def _identifier(name):
+    """
+    Table and column names cannot be query parameters; only plain identifiers are accepted.
+    """
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
 class Database:
-    def __init__(self):
-        pass
+    """
+    Data-access layer on top of a ConnectionPool. Models borrow a connection for
+    the duration of a block:
+
+        with db.connection() as conn:
+            rows = conn.execute("SELECT ...").fetchall()
+
+    The block commits on success and rolls back on error.
+    """
+    def __init__(self, driver=None, min_size=1, max_size=10, timeout=5.0):
+        self.driver = driver or SQLiteDriver()
+        self.pool = ConnectionPool(self.driver, min_size=min_size, max_size=max_size, timeout=timeout)
+        self._schema_pid = None
+        self._schema_lock = threading.Lock()
 
+    @property
+    def cache_key(self):
+        # Keys the @cached_query methods below, so databases never see each other's results
+        return self.driver.cache_key
+
+    @contextmanager
+    def connection(self):
+        with self.pool.connection() as conn:
+            if self._schema_pid != os.getpid():
+                # Only one thread creates the schema; the others wait for it
+                with self._schema_lock:
+                    if self._schema_pid != os.getpid():
+                        self._create_schema(conn)
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def _create_schema(self, conn):
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT OR IGNORE INTO collections (name, data) VALUES (?, ?)",
+            [(name, json.dumps(data)) for name, data in SEED_COLLECTIONS.items()]
+        )
+        conn.executemany("INSERT OR IGNORE INTO users (id, name, email) VALUES (?, ?, ?)", SEED_USERS)
+        conn.commit()
+        self._schema_pid = os.getpid()
+
+    def query(self, sql, params=()):
+        """
+        Runs a SELECT and returns all rows.
+        """
+        started = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            metrics.record('db', time.perf_counter() - started)
+
+    def fetch_rows(self, sql, params=()):
+        """
+        Runs a SELECT and returns the rows as Row objects (see row_class).
+        """
+        return self._fetch_rows(sql, params)[1]
+
+    def _fetch_rows(self, sql, params=()):
+        """
+        fetch_rows, also returning the column names (Row field names may have been renamed).
+        """
+        started = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute(sql, params)
+                columns = tuple(column[0] for column in cursor.description)
+                Row = row_class(columns)
+                return columns, [Row._make(row) for row in cursor.fetchall()]
+        finally:
+            metrics.record('db', time.perf_counter() - started)
+
+    def get_many(self, table, ids, key='id', columns=None):
+        """
+        Fetches the rows of table whose key column is in ids with one
+        SELECT ... WHERE key IN (...) per MAX_BATCH_SIZE ids, instead of one query per id.
+        Returns a dict of key value -> Row; ids that do not exist are left out.
+        """
+        table = _identifier(table)
+        key = _identifier(key)
+        if columns and key not in columns:
+            columns = (key, *columns)
+        select = ', '.join(_identifier(column) for column in columns) if columns else '*'
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        for start in range(0, len(ids), MAX_BATCH_SIZE):
+            batch = ids[start:start + MAX_BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            names, rows = self._fetch_rows(f"SELECT {select} FROM {table} WHERE {key} IN ({placeholders})", batch)
+            # By position: namedtuple renames fields such as '_id', so row.<key> may not exist
+            index = [name.lower() for name in names].index(key.lower())
+            for row in rows:
+                found[row[index]] = row
+        return found
+
+    def execute(self, sql, params=()):
+        """
+        Runs a statement that modifies data and returns the number of affected rows.
+        """
+        started = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            metrics.record('db', time.perf_counter() - started)
+
+    @cached_query(ttl=60, tags=('collection:{collection_name}',))
     def get_data(self, collection_name):
-        if collection_name == "home_page_data":
-            return {
-                "title": "Welcome to My MVC App!",
-                "message": "This is a simple demonstration of the MVC pattern in Python.",
-                "items": ["Item 1", "Item 2", "Item 3"]
-            }
-        return {}
-
-db = Database()
+        rows = self.query("SELECT data FROM collections WHERE name = ?", (collection_name,))
+        if not rows:
+            return {}
+        return json.loads(rows[0][0])
+
+    def get_data_many(self, collection_names):
+        """
+        Bulk version of get_data: one query for all the collections.
+        Returns a dict of collection name -> data ({} for a missing collection).
+        """
+        rows = self.get_many('collections', collection_names, key='name')
+        return {name: json.loads(rows[name].data) if name in rows else {} for name in collection_names}
+
+    def set_data(self, collection_name, data):
+        self.execute(
+            "INSERT OR REPLACE INTO collections (name, data) VALUES (?, ?)",
+            (collection_name, json.dumps(data))
+        )
+        invalidate_tags(f"collection:{collection_name}")
+
+
+def _database_from_env():
+    """
+    Builds the default Database from MVC_DB_* environment variables:
+    MVC_DB_DRIVER (default 'sqlite'), MVC_DB_PATH (SQLite file; in-memory if unset),
+    MVC_DB_POOL_MIN, MVC_DB_POOL_MAX and MVC_DB_POOL_TIMEOUT (seconds).
+    """
+    driver_name = os.environ.get('MVC_DB_DRIVER', 'sqlite')
+    driver_class = DRIVERS.get(driver_name)
+    if driver_class is None:
+        raise ValueError(f"Unknown database driver '{driver_name}'. Registered drivers: {', '.join(DRIVERS)}")
+    driver = driver_class(os.environ.get('MVC_DB_PATH')) if driver_class is SQLiteDriver else driver_class()
+    return Database(
+        driver,
+        min_size=int(os.environ.get('MVC_DB_POOL_MIN', '1')),
+        max_size=int(os.environ.get('MVC_DB_POOL_MAX', '10')),
+        timeout=float(os.environ.get('MVC_DB_POOL_TIMEOUT', '5')),
+    )
+
+
+db = _database_from_env()
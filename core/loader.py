@@ -0,0 +1,100 @@
+# core/loader.py
+
+from core.cache import request_memo
+
+
+class Deferred:
+    """
+    Handle for a value requested from a BatchLoader. Reading .value fetches every
+    key queued on the loader so far in one batch, if this one is not loaded yet.
+    """
+    __slots__ = ('loader', 'key')
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+
+    @property
+    def value(self):
+        return self.loader.get(self.key)
+
+
+class BatchLoader:
+    """
+    Dataloader-style batcher. load() only queues a key and returns a Deferred; the
+    first time any queued value is needed, all pending keys are fetched with a single
+    call to batch_fn(keys), which returns a dict of key -> value. Results are kept for
+    the lifetime of the loader, so each key is fetched at most once:
+
+        deferred = [users.load(user_id) for user_id in user_ids]  # no queries yet
+        rows = [d.value for d in deferred]                         # one query
+
+    Use request_loader() to share one loader per request.
+    """
+    def __init__(self, batch_fn):
+        self.batch_fn = batch_fn
+        self._pending = {}  # keys queued since the last dispatch (a dict keeps their order)
+        self._results = {}
+        self.batches = 0
+
+    def load(self, key):
+        if key not in self._results:
+            self._pending[key] = None
+        return Deferred(self, key)
+
+    def load_many(self, keys):
+        """
+        Returns the values for keys (None for missing ones), fetching the ones not yet
+        loaded, together with anything else pending, in one batch.
+        """
+        for key in keys:
+            self.load(key)
+        return [self.get(key) for key in keys]
+
+    def get(self, key):
+        if key not in self._results:
+            self._pending[key] = None
+            self.dispatch()
+        return self._results[key]
+
+    def dispatch(self):
+        """
+        Fetches every pending key now.
+        """
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        found = self.batch_fn(keys)
+        self.batches += 1
+        for key in keys:
+            self._results[key] = found.get(key)
+
+    def prime(self, key, value):
+        self._pending.pop(key, None)
+        self._results[key] = value
+
+    def clear(self, key=None):
+        """
+        Forgets one loaded key (e.g. after it was written), or all of them.
+        """
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
+
+
+def request_loader(name, batch_fn):
+    """
+    Returns the BatchLoader called name for the current request, creating it on
+    first use, so every lookup made while handling one request is batched together.
+    Outside of a request a fresh loader is returned.
+    """
+    memo = request_memo()
+    if memo is None:
+        return BatchLoader(batch_fn)
+    key = ('loader', name)
+    loader = memo.get(key)
+    if loader is None:
+        loader = memo[key] = BatchLoader(batch_fn)
+    return loader
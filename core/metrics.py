@@ -0,0 +1,413 @@
+# core/metrics.py
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: stale snapshots are then only retired by gunicorn's child_exit hook
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Pipeline stages timed separately for every request; 'compile' (reading a view and
+# including its partials) only happens on the requests that (re)compile a view
+STAGES = ('resolve', 'controller', 'db', 'compile', 'render')
+
+# Seconds between two snapshot writes of one worker into MVC_METRICS_DIR
+FLUSH_INTERVAL = 1.0
+
+# Snapshot in MVC_METRICS_DIR holding the sum of every worker that has exited
+RETIRED_SNAPSHOT = 'retired.json'
+
+
+class RequestTimings:
+    """
+    Timings collected while one request is handled. Stages may be recorded several
+    times (e.g. many DB queries); their durations are summed.
+    """
+    __slots__ = ('start', 'route', 'status', 'stages')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route = 'unmatched'
+        self.status = 200
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current_request = contextvars.ContextVar('mvc_metrics_request', default=None)
+
+
+class Metrics:
+    """
+    Low-overhead, in-process metrics registry: per-route histograms of request and
+    stage durations, response counters by status, and cache hit/miss counters.
+
+    Each observation is a perf_counter() call, a bisect over the bucket bounds and a
+    few dict updates. When MVC_METRICS_DIR is set, every worker writes a snapshot
+    there (at most once per FLUSH_INTERVAL), and render_prometheus() sums the
+    snapshots of all workers.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric, route, stage) -> [bucket counts, sum, count]
+        self._counters = {}    # (metric, label) -> value
+        self._caches = {}      # cache name -> object with hits/misses attributes
+        self._last_flush = 0.0
+        self._pid = os.getpid()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            retire_dead_workers(directory)
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # A forked worker starts from zero: whatever the parent recorded (e.g. while
+            # preloading) would otherwise be counted again by every worker it forks
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._histograms = {}
+            self._counters = {}
+            self._last_flush = 0.0
+
+    # --- collection -------------------------------------------------------
+
+    def start_request(self):
+        self._check_fork()
+        timings = RequestTimings()
+        _current_request.set(timings)
+        return timings
+
+    def current_request(self):
+        """
+        Timings of the request being handled, or None.
+        """
+        return _current_request.get()
+
+    def detach_request(self):
+        """
+        Leaves a request without finishing it; a streamed page finishes its timings
+        when the last chunk has been rendered (see resume_request).
+        """
+        _current_request.set(None)
+
+    @contextmanager
+    def resume_request(self, timings):
+        """
+        Makes timings the current request again for the duration of the block, e.g.
+        while one chunk of a streamed page renders after the request was detached.
+        """
+        token = _current_request.set(timings)
+        try:
+            yield timings
+        finally:
+            _current_request.reset(token)
+
+    def record(self, stage, seconds):
+        """
+        Adds a stage duration to the request being handled. Outside of a request
+        (e.g. a query run at startup) it is observed directly.
+        """
+        timings = _current_request.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+        else:
+            self.observe('mvc_stage_duration_seconds', 'none', stage, seconds)
+
+    def set_route(self, route_label):
+        timings = _current_request.get()
+        if timings is not None:
+            timings.route = route_label
+
+    def finish_request(self, timings):
+        total = time.perf_counter() - timings.start
+        _current_request.set(None)
+        with self._lock:
+            self._observe('mvc_request_duration_seconds', timings.route, '', total)
+            for stage, seconds in timings.stages.items():
+                self._observe('mvc_stage_duration_seconds', timings.route, stage, seconds)
+            key = ('mvc_responses_total', str(timings.status))
+            self._counters[key] = self._counters.get(key, 0) + 1
+        if self.directory and time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def observe(self, metric, route, stage, seconds):
+        self._check_fork()
+        with self._lock:
+            self._observe(metric, route, stage, seconds)
+
+    def _observe(self, metric, route, stage, seconds):
+        key = (metric, route, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+        histogram[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+    def register_cache(self, name, cache):
+        """
+        Exports the hits/misses counters of a cache (e.g. core.cache.response_cache).
+        """
+        self._caches[name] = cache
+
+    # --- aggregation ------------------------------------------------------
+
+    def snapshot(self):
+        self._check_fork()
+        with self._lock:
+            histograms = [[list(key), [list(h[0]), h[1], h[2]]] for key, h in self._histograms.items()]
+            counters = [[list(key), value] for key, value in self._counters.items()]
+        caches = [[name, cache.hits, cache.misses] for name, cache in self._caches.items()]
+        return {'histograms': histograms, 'counters': counters, 'caches': caches}
+
+    def flush(self):
+        """
+        Writes this worker's snapshot to MVC_METRICS_DIR/<pid>.json.
+        """
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        try:
+            _write_snapshot(path, self.snapshot())
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot '{path}': {e}")
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        retire_dead_workers(self.directory)
+        snapshots = []
+        retired_pids = set()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            snapshot = _read_snapshot(os.path.join(self.directory, name))
+            if snapshot is None:
+                continue
+            if name == RETIRED_SNAPSHOT:
+                retired_pids.update(snapshot.get('pids', ()))
+            snapshots.append((name, snapshot))
+        # A worker being retired is already counted in the retired snapshot
+        return [snapshot for name, snapshot in snapshots if name[:-5] not in retired_pids]
+
+    def aggregate(self):
+        """
+        Sums the snapshots of every worker. Workers that have exited are kept in the
+        retired snapshot (see retire_worker), so counters never go backwards after a
+        worker restart.
+        """
+        return _merge(self._snapshots())
+
+    # --- exposition -------------------------------------------------------
+
+    def render_prometheus(self):
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        """
+        histograms, counters, caches = self.aggregate()
+        lines = []
+
+        for metric, help_text in (
+            ('mvc_request_duration_seconds', 'Time spent handling a request, by route.'),
+            ('mvc_stage_duration_seconds', 'Time spent in each pipeline stage, by route.'),
+        ):
+            keys = sorted(key for key in histograms if key[0] == metric)
+            if not keys:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            quantile_lines = []
+            for key in keys:
+                buckets, total, count = histograms[key]
+                labels = _labels(key[1], key[2])
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, buckets):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {total}")
+                lines.append(f"{metric}_count{{{labels}}} {count}")
+                for q in QUANTILES:
+                    quantile_lines.append(f'{metric}_quantile{{{labels},quantile="{q}"}} {_quantile(buckets, count, q)}')
+            lines.append(f"# HELP {metric}_quantile Quantiles estimated from the histogram buckets.")
+            lines.append(f"# TYPE {metric}_quantile gauge")
+            lines.extend(quantile_lines)
+
+        if counters:
+            lines.append("# HELP mvc_responses_total Responses sent, by status code.")
+            lines.append("# TYPE mvc_responses_total counter")
+            for (metric, status), value in sorted(counters.items()):
+                lines.append(f'{metric}{{status="{status}"}} {value}')
+
+        if caches:
+            lines.append("# HELP mvc_cache_requests_total Cache lookups, by cache and result.")
+            lines.append("# TYPE mvc_cache_requests_total counter")
+            for name, (hits, misses) in sorted(caches.items()):
+                lines.append(f'mvc_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+                lines.append(f'mvc_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+            lines.append("# HELP mvc_cache_hit_ratio Share of cache lookups that were hits.")
+            lines.append("# TYPE mvc_cache_hit_ratio gauge")
+            for name, (hits, misses) in sorted(caches.items()):
+                ratio = hits / (hits + misses) if hits + misses else 0.0
+                lines.append(f'mvc_cache_hit_ratio{{cache="{name}"}} {ratio}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path, snapshot):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _merge(snapshots):
+    """
+    Sums snapshots into (histograms, counters, caches) dicts.
+    """
+    histograms, counters, caches = {}, {}, {}
+    for snapshot in snapshots:
+        for key, (buckets, total, count) in snapshot['histograms']:
+            merged = histograms.setdefault(tuple(key), [[0] * len(BUCKETS), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+        for key, value in snapshot['counters']:
+            counters[tuple(key)] = counters.get(tuple(key), 0) + value
+        for name, hits, misses in snapshot['caches']:
+            merged = caches.setdefault(name, [0, 0])
+            merged[0] += hits
+            merged[1] += misses
+    return histograms, counters, caches
+
+
+@contextmanager
+def _directory_lock(directory):
+    """
+    Serializes the writers of RETIRED_SNAPSHOT across processes (flock on a lock file).
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # e.g. EPERM: the pid exists but belongs to another user
+    return True
+
+
+def retire_dead_workers(directory):
+    """
+    Retires the snapshots of processes that are no longer running. gunicorn.conf.py
+    retires each worker as it exits (child_exit); this covers every other launch
+    (plain gunicorn, uvicorn, a crashed master), so the snapshots of dead workers
+    never pile up. Runs when Metrics starts and on every /metrics scrape. POSIX only.
+    """
+    if fcntl is None:
+        return
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        pid = name[:-5]
+        if name.endswith('.json') and pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            retire_worker(directory, pid)
+
+
+def retire_worker(directory, pid):
+    """
+    Folds the snapshot of an exited worker into RETIRED_SNAPSHOT and deletes its own
+    file, so the directory holds one file per live worker plus one for all the
+    retired ones however often workers are recycled. Called by the gunicorn master
+    (child_exit in gunicorn.conf.py) and by retire_dead_workers; the writers hold a
+    lock on the directory.
+    """
+    with _directory_lock(directory):
+        _retire_worker(directory, pid)
+
+
+def _retire_worker(directory, pid):
+    path = os.path.join(directory, f"{pid}.json")
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+    retired = _read_snapshot(retired_path)
+    histograms, counters, caches = _merge([retired, snapshot] if retired else [snapshot])
+    merged = {
+        'histograms': [[list(key), h] for key, h in histograms.items()],
+        'counters': [[list(key), value] for key, value in counters.items()],
+        'caches': [[name, hits, misses] for name, (hits, misses) in caches.items()],
+    }
+    try:
+        # Readers skip the pid file while it is listed here, so it is never counted twice
+        _write_snapshot(retired_path, dict(merged, pids=[str(pid)]))
+        os.remove(path)
+        _write_snapshot(retired_path, dict(merged, pids=[]))
+    except OSError as e:
+        logger.warning(f"Could not retire the metrics snapshot of worker {pid}: {e}")
+
+
+def _labels(route, stage):
+    labels = f'route="{route}"'
+    if stage:
+        labels += f',stage="{stage}"'
+    return labels
+
+
+def _quantile(buckets, count, q):
+    """
+    Estimates a quantile by linear interpolation inside the bucket that contains it.
+    """
+    if not count:
+        return 0.0
+    rank = q * count
+    cumulative = 0
+    lower = 0.0
+    for bound, bucket_count in zip(BUCKETS, buckets):
+        if cumulative + bucket_count >= rank and bucket_count:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * (rank - cumulative) / bucket_count
+        cumulative += bucket_count
+        if bound != float('inf'):
+            lower = bound
+    return lower
+
+
+metrics = Metrics(os.environ.get('MVC_METRICS_DIR'))
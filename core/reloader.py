@@ -0,0 +1,328 @@
+# core/reloader.py
+
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+import importlib
+import threading
+
+from core.autoload import load_controller
+from core.cache import query_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two scans of the polling watcher
+POLL_INTERVAL = 0.5
+
+# Editors often write a file in several steps; changes arriving within this many
+# seconds of the first one are handled together
+DEBOUNCE = 0.05
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len (struct inotify_event)
+
+WATCHED_EXTENSIONS = ('.html', '.py')
+
+
+def _watched(path):
+    return path.endswith(WATCHED_EXTENSIONS) and '__pycache__' not in path
+
+
+class PollingWatcher:
+    """
+    Portable watcher: rescans the directories every interval and compares mtimes.
+    """
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = directories
+        self.interval = interval
+        self._mtimes = self._scan()
+
+    def _scan(self):
+        mtimes = {}
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [d for d in dirs if d != '__pycache__']
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    if not _watched(path):
+                        continue
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime_ns
+                    except OSError:
+                        pass
+        return mtimes
+
+    def wait(self, timeout):
+        """
+        Returns the set of paths created, modified or deleted since the last call,
+        waiting up to timeout seconds.
+        """
+        if timeout:
+            time.sleep(min(timeout, self.interval))
+        mtimes = self._scan()
+        changed = {path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime}
+        changed |= self._mtimes.keys() - mtimes.keys()
+        self._mtimes = mtimes
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux watcher on top of inotify(7), called through ctypes so no extra package
+    is needed. Every directory below the watched ones gets its own watch, including
+    directories created later. Raises OSError when inotify is not available.
+    """
+    def __init__(self, directories):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = directories
+        self._paths = {}  # watch descriptor -> directory
+        for directory in directories:
+            self._add_tree(directory)
+
+    def _add_tree(self, directory):
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch '{root}': {os.strerror(ctypes.get_errno())}")
+                continue
+            self._paths[wd] = root
+
+    def wait(self, timeout):
+        """
+        Returns the set of paths that changed, waiting up to timeout seconds for the
+        first event. When the kernel queue overflowed, every watched directory is
+        returned instead, meaning "anything may have changed".
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.directories)
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_DELETE_SELF:
+                    self._paths.pop(wd, None)
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # A new directory: watch it, and report what is already inside
+                        self._add_tree(path)
+                        changed.add(path)
+                elif _watched(path):
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(directories, interval=POLL_INTERVAL):
+    """
+    Returns an InotifyWatcher on Linux, or a PollingWatcher when inotify is unavailable.
+    """
+    directories = [d for d in directories if os.path.isdir(d)]
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), falling back to polling.")
+    return PollingWatcher(directories, interval)
+
+
+class Reloader:
+    """
+    Development reloader. Watches views/, controllers/ and models/ in a background
+    thread and applies each change to the running App:
+
+    * a view: only that compiled view is dropped; a partial: the views that include it;
+    * a controller: its module is reloaded and its routes replaced in the route table;
+    * a model: its module is reloaded, then every controller module that uses it.
+
+    Pages cached with @cache_page are dropped on every change, and query
+    results on a model change. With the reloader running the App renders from frozen
+    templates, so requests never stat the view files.
+    """
+    def __init__(self, app, interval=POLL_INTERVAL):
+        self.app = app
+        self.interval = interval
+        base_dir = os.path.abspath(app.base_dir)
+        self.views_dir = os.path.join(base_dir, 'views')
+        self.controllers_dir = os.path.join(base_dir, 'controllers')
+        self.models_dir = os.path.join(base_dir, 'models')
+        self.watcher = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.watcher = create_watcher([self.views_dir, self.controllers_dir, self.models_dir], self.interval)
+        self._thread = threading.Thread(target=self._run, name='mvc-reloader', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching for changes with {type(self.watcher).__name__}.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.watcher is not None:
+            self.watcher.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            changed = self.watcher.wait(self.interval)
+            if not changed:
+                continue
+            time.sleep(DEBOUNCE)
+            changed |= self.watcher.wait(0)
+            try:
+                self.apply(changed)
+            except Exception as e:
+                logger.error(f"Reload failed: {e}")
+
+    def apply(self, changed):
+        """
+        Applies a set of changed file paths (or directories, meaning everything in them).
+        """
+        views = set()
+        controllers = set()
+        models = set()
+        for path in changed:
+            if _inside(path, self.views_dir):
+                views.add(path)
+            elif _inside(path, self.controllers_dir):
+                controllers.add(path)
+            elif _inside(path, self.models_dir):
+                models.add(path)
+
+        if views:
+            self._reload_views(views)
+        for path in models:
+            controllers |= self._reload_model(path)
+        for path in controllers:
+            self._reload_controller(path)
+        if views or controllers or models:
+            self.app.response_cache.clear()
+
+    def _reload_views(self, paths):
+        templates = self.app.templates
+        for path in paths:
+            if not path.endswith('.html'):
+                # A directory (new, or after an inotify overflow): start over
+                templates.partials.build()
+                templates.invalidate()
+                logger.info(f"Reloaded all views after a change in '{path}'.")
+                return
+            name = os.path.relpath(path, self.views_dir)[:-5].replace(os.sep, '/')
+            if '/partials/' in f"/{name}":
+                templates.partial_changed(name)
+                logger.info(f"Reloaded partial '{name}'.")
+            else:
+                templates.invalidate(name + '.html')
+                logger.info(f"Reloaded view '{name}.html'.")
+
+    def _reload_model(self, path):
+        """
+        Reloads one model module. Returns the paths of the controller modules that
+        import from it, since they hold references to the old classes.
+        """
+        module_name = f"models.{_module_stem(path)}"
+        module = sys.modules.get(module_name)
+        if module is None:
+            return set()
+        if not os.path.exists(path):
+            logger.warning(f"Model module '{module_name}' was deleted; keeping the loaded version.")
+            return set()
+        try:
+            importlib.reload(module)
+        except Exception as e:
+            logger.error(f"Could not reload '{module_name}': {e}")
+            return set()
+        # Results computed by the old code may be stale
+        query_cache.clear()
+        logger.info(f"Reloaded model module '{module_name}'.")
+
+        dependents = set()
+        for name, candidate in list(sys.modules.items()):
+            if not name.startswith('controllers.') or candidate is None:
+                continue
+            if any(getattr(value, '__module__', None) == module_name for value in vars(candidate).values()):
+                dependents.add(getattr(candidate, '__file__', None) or os.path.join(self.controllers_dir, name.split('.', 1)[1] + '.py'))
+        return dependents
+
+    def _reload_controller(self, path):
+        if not path.endswith('.py'):
+            return
+        stem = _module_stem(path)
+        if stem == '__init__':
+            return
+        controller_name = stem.lower()
+        module_name = f"controllers.{stem}"
+        router = self.app.router
+        controllers = self.app.controllers
+
+        if not os.path.exists(path):
+            router.remove_controller(controller_name)
+            if controller_name in controllers:
+                del controllers[controller_name]
+            sys.modules.pop(module_name, None)
+            logger.info(f"Removed controller '{controller_name}'.")
+            return
+
+        controller = load_controller(stem, reload=True)
+        if controller is None:
+            # Keep serving the previous version until the module loads again
+            return
+        controllers[controller_name] = controller
+        router.add_controller(controller_name, controller)
+        routes = sum(1 for name, _ in router.routes if name == controller_name)
+        logger.info(f"Reloaded controller '{controller_name}' ({routes} routes).")
+
+
+def _inside(path, directory):
+    return path == directory or path.startswith(directory + os.sep)
+
+
+def _module_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
@@ -0,0 +1,175 @@
+# core/response.py
+
+from http import HTTPStatus
+
+from core.conditional import compute_etag, conditional_headers, is_not_modified
+from core.compression import MIN_SIZE, compressed_cache, compress_stream, is_compressible, negotiate
+
+HTML = 'text/html; charset=utf-8'
+TEXT = 'text/plain; charset=utf-8'
+
+
+class Response:
+    """
+    Structured result of App.dispatch: status code, headers and body. The body is
+    a str, or an iterator of str chunks for streamed pages; after compress() it is
+    bytes (or an iterator of bytes chunks).
+    """
+    def __init__(self, body='', status=200, headers=None, content_type=HTML):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        self.headers.setdefault('Content-Type', content_type)
+        # Content-Type of a 200 body large enough to compress that make_conditional() turned into a 304
+        self._revalidated_type = None
+
+    @property
+    def streamed(self):
+        return not isinstance(self.body, (str, bytes))
+
+    @property
+    def status_line(self):
+        try:
+            return f"{self.status} {HTTPStatus(self.status).phrase}"
+        except ValueError:
+            return str(self.status)
+
+    @property
+    def allows_body(self):
+        """
+        False for statuses that never carry a body (1xx, 204, 304); those responses
+        are also sent without a Content-Length (RFC 7230, section 3.3.2).
+        """
+        return self.status >= 200 and self.status not in (204, 304)
+
+    def make_conditional(self, request_headers):
+        """
+        Adds an ETag to a complete 200 response and turns it into a bodiless 304
+        when the request's If-None-Match matches it. request_headers is any
+        mapping with .get('If-None-Match').
+        """
+        if self.status != 200 or self.streamed:
+            return self
+        etag = compute_etag(self.body)
+        self.headers.update(conditional_headers(etag))
+        if is_not_modified(request_headers, etag):
+            content_type = self.headers.pop('Content-Type', None)
+            if len(self.encoded_body()) >= MIN_SIZE:
+                self._revalidated_type = content_type
+            self.status = 304
+            self.body = ''
+        return self
+
+    def compress(self, request_headers):
+        """
+        Compresses a 200 response with the best encoding the client accepts
+        (Accept-Encoding). Complete bodies go through the compressed-output cache,
+        keyed by content hash, so an unchanged page is compressed only once; streamed
+        bodies are compressed chunk by chunk. Call it after make_conditional().
+        """
+        if self.status == 304:
+            # The 304 carries the validators the full response would have sent
+            if is_compressible(self._revalidated_type):
+                self.headers['Vary'] = 'Accept-Encoding'
+                if negotiate(request_headers.get('Accept-Encoding')):
+                    self.headers['ETag'] = 'W/' + self.headers['ETag']
+            return self
+        if self.status != 200 or 'Content-Encoding' in self.headers or not is_compressible(self.headers.get('Content-Type')):
+            return self
+        if not self.streamed:
+            data = self.encoded_body()
+            if len(data) < MIN_SIZE:
+                return self
+        self.headers['Vary'] = 'Accept-Encoding'
+        encoding = negotiate(request_headers.get('Accept-Encoding'))
+        if encoding is None:
+            return self
+
+        self.headers['Content-Encoding'] = encoding
+        if self.streamed:
+            source = _iter_bytes(self.body)
+            self.body = ClosingIterator(compress_stream(source, encoding), source.close)
+            return self
+        etag = self.headers.get('ETag') or compute_etag(data)
+        self.body = compressed_cache.get_or_compress(etag, data, encoding)
+        if 'ETag' in self.headers:
+            # Same validator for every encoding of the page, as nginx does: a weak ETag
+            # still matches If-None-Match (see core.conditional.etag_matches)
+            self.headers['ETag'] = 'W/' + etag
+        return self
+
+    def encoded_body(self):
+        """
+        The body as bytes (complete responses only).
+        """
+        if isinstance(self.body, bytes):
+            return self.body
+        return self.body.encode('utf-8')
+
+    def iter_encoded(self):
+        """
+        Returns an iterator of the body as bytes chunks; works for both complete and
+        streamed responses. Closing it closes a streamed body too.
+        """
+        if self.streamed:
+            return _iter_bytes(self.body)
+        return iter([self.encoded_body()] if self.body else [])
+
+    def __repr__(self):
+        return f"<Response {self.status_line}{' streamed' if self.streamed else ''}>"
+
+
+class ClosingIterator:
+    """
+    Iterator over the chunks of a streamed body with a close() method, as PEP 3333
+    servers call it. Closing it (or running it to the end) closes the wrapped
+    iterator and then calls on_close, exactly once, even when no chunk was ever
+    read; a generator that never started would not run its finally block.
+    """
+    __slots__ = ('_chunks', '_on_close')
+
+    def __init__(self, chunks, on_close=None):
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            # Exhausted or failed: nothing more will be read
+            self.close()
+            raise
+
+    def close(self):
+        chunks, self._chunks = self._chunks, iter(())
+        on_close, self._on_close = self._on_close, None
+        try:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            if on_close is not None:
+                on_close()
+
+
+def _to_bytes(chunk):
+    return chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+
+
+def _iter_bytes(chunks):
+    return ClosingIterator(map(_to_bytes, chunks), getattr(chunks, 'close', None))
+
+
+class EnvironHeaders:
+    """
+    Read-only view of the HTTP request headers in a WSGI environ, e.g.
+    headers.get('If-None-Match') reads environ['HTTP_IF_NONE_MATCH'].
+    """
+    def __init__(self, environ):
+        self.environ = environ
+
+    def get(self, name, default=None):
+        return self.environ.get('HTTP_' + name.upper().replace('-', '_'), default)
@@ -0,0 +1,169 @@
+# core/router.py
+
+import inspect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROLLER = 'home'
+DEFAULT_METHOD = 'index'
+
+
+class Route:
+    """
+    A single (controller, method) pair with its bound handler and the number of
+    URL arguments it accepts. The first parameter of every controller method is the
+    render_template_func, so it is not counted as a URL argument.
+    """
+    def __init__(self, controller_name, method_name, handler):
+        self.controller_name = controller_name
+        self.method_name = method_name
+        self.handler = handler
+        self.min_args, self.max_args, self.defaults = self._parse_signature(handler)
+        # Set by the @cache_page decorator (core.cache) on methods that opt into page caching
+        self.cache_page = getattr(handler, 'cache_page', False)
+        self.cache_ttl = getattr(handler, 'cache_ttl', None)
+        # Set by the @stream_response decorator (core.template) on methods whose page is streamed
+        self.stream_response = getattr(handler, 'stream_response', False)
+        # 'async def' controller methods are awaited instead of called
+        self.is_async = inspect.iscoroutinefunction(handler)
+
+    @staticmethod
+    def _parse_signature(handler):
+        params = list(inspect.signature(handler).parameters.values())[1:]  # Skip render_template_func
+        min_args = 0
+        max_args = 0
+        defaults = {}
+        for param in params:
+            if param.kind == param.VAR_POSITIONAL:
+                max_args = None
+            elif param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                if param.default is param.empty:
+                    min_args += 1
+                else:
+                    defaults[param.name] = param.default
+                if max_args is not None:
+                    max_args += 1
+            elif param.kind == param.KEYWORD_ONLY and param.default is param.empty:
+                # URL segments are passed positionally, so nothing could ever fill it
+                raise TypeError(f"required keyword-only parameter '{param.name}' cannot come from the URL")
+        return min_args, max_args, defaults
+
+    def accepts(self, arg_count):
+        return arg_count >= self.min_args and (self.max_args is None or arg_count <= self.max_args)
+
+    def __repr__(self):
+        upper = '*' if self.max_args is None else self.max_args
+        return f"<Route /{self.controller_name}/{self.method_name} args={self.min_args}..{upper}>"
+
+
+class Router:
+    """
+    Route table compiled once from the loaded controller instances. Every public
+    method of a controller becomes a route, so dispatch is a single dict lookup
+    with the argument count checked before the handler is called.
+    With a lazy controller mapping (core.autoload.LazyControllers), the routes of a
+    controller are compiled the first time one of them is requested.
+    """
+    def __init__(self, controllers):
+        self.routes = {}
+        self.controller_names = set()
+        self._lock = threading.Lock()
+        self.build(controllers)
+
+    def build(self, controllers):
+        self.routes = {}
+        self.controllers = controllers
+        self.controller_names = set(controllers)
+        self._compiled = set()
+        # Lazy mappings only hand out the controllers that are already imported
+        loaded_items = getattr(controllers, 'loaded_items', controllers.items)
+        for controller_name, controller_instance in loaded_items():
+            self.add_controller(controller_name, controller_instance)
+        logger.info(f"Compiled route table with {len(self.routes)} routes.")
+
+    def add_controller(self, controller_name, controller_instance):
+        """
+        Adds (or replaces) the routes of one controller instance.
+        """
+        routes = {}
+        for method_name, handler in inspect.getmembers(controller_instance, inspect.ismethod):
+            if method_name.startswith('_'):
+                continue
+            try:
+                route = Route(controller_name, method_name, handler)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping {controller_name}.{method_name}: cannot read its signature ({e}).")
+                continue
+            routes[(controller_name, route.method_name)] = route
+
+        # Swap in a new table, so concurrent lookups never see a half-updated one
+        table = {key: route for key, route in self.routes.items() if key[0] != controller_name}
+        table.update(routes)
+        self.routes = table
+        self.controller_names.add(controller_name)
+        self._compiled.add(controller_name)
+
+    def remove_controller(self, controller_name):
+        """
+        Drops every route of one controller.
+        """
+        self.routes = {key: route for key, route in self.routes.items() if key[0] != controller_name}
+        self.controller_names.discard(controller_name)
+        self._compiled.discard(controller_name)
+
+    def _compile_lazy(self, controller_name, method_name):
+        """
+        Imports a not-yet-loaded controller and compiles its routes.
+        """
+        with self._lock:
+            if controller_name not in self._compiled:
+                controller_instance = self.controllers.get(controller_name)
+                if controller_instance is None:
+                    # Import failed; treat it as unknown from now on
+                    self.controller_names.discard(controller_name)
+                    return None
+                self.add_controller(controller_name, controller_instance)
+        return self.routes.get((controller_name, method_name))
+
+    def compile_all(self):
+        """
+        Compiles the routes of every controller, importing lazy ones if needed.
+        """
+        for controller_name in list(self.controller_names):
+            if controller_name not in self._compiled:
+                self._compile_lazy(controller_name, None)
+
+    @staticmethod
+    def split_path(path):
+        """
+        Splits a URL path into (controller_name, method_name, args), applying the
+        default controller and method when they are missing.
+        """
+        segments = [s for s in path.strip('/').split('/') if s]
+        if not segments:
+            return DEFAULT_CONTROLLER, DEFAULT_METHOD, []
+        controller_name = segments[0].lower()
+        method_name = segments[1].lower() if len(segments) > 1 else DEFAULT_METHOD
+        return controller_name, method_name, segments[2:]
+
+    def resolve(self, path):
+        """
+        Resolves a path to (route, args, error). On failure route is None and error
+        holds the 404 message to return.
+        """
+        controller_name, method_name, args = self.split_path(path)
+        route = self.routes.get((controller_name, method_name))
+        if route is None and controller_name in self.controller_names and controller_name not in self._compiled:
+            route = self._compile_lazy(controller_name, method_name)
+        if route is None:
+            if controller_name not in self.controller_names:
+                logger.warning(f"Controller '{controller_name}' not found for path '{path}'.")
+                return None, args, "404 Not Found: Controller not found"
+            logger.warning(f"Method '{method_name}' not found or not callable in controller '{controller_name}' for path '{path}'.")
+            return None, args, "404 Not Found: Method not found"
+        if not route.accepts(len(args)):
+            logger.warning(f"{route!r} does not accept {len(args)} arguments for path '{path}'.")
+            return None, args, "404 Not Found: Invalid number of arguments"
+        return route, args, None
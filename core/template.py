@@ -0,0 +1,635 @@
+# core/template.py
+
+import os
+import re
+import time
+import logging
+import operator
+import itertools
+import threading
+from collections.abc import Iterator, Mapping
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Matches {{ placeholder }} slots, {{ for item in items }} ... {{ endfor }} loops, and
+# dotted lookups such as {{ user.name }}. Compiled once at import time instead of per render.
+PLACEHOLDER_PATTERN = re.compile(r'{{\s*(\w+(?:\.\w+)*)\s*}}')
+TAG_PATTERN = re.compile(
+    r'{{\s*(?:for\s+(?P<var>\w+)\s+in\s+(?P<iterable>\w+(?:\.\w+)*)|(?P<endfor>endfor)|(?P<name>\w+(?:\.\w+)*))\s*}}'
+)
+
+# Matches {{ partials/path/to/partial }} includes. The tag may not span another tag.
+PARTIAL_PATTERN = re.compile(r'{{ partials/(.*?) }}', re.S)
+
+# Streaming renders coalesce small chunks into writes of roughly this many characters
+STREAM_CHUNK_SIZE = 8192
+
+# Streamed loops render their rows in batches of this many items
+LOOP_BATCH_SIZE = 1000
+
+# Joins the values of a column before they are escaped in one pass; never escaped itself
+_SEPARATOR = '\0'
+
+# Returned by Placeholder.get when the context has no value for the slot
+_MISSING = object()
+
+
+class TemplateSyntaxError(ValueError):
+    """
+    Raised when a view cannot be compiled, e.g. a {{ for }} without its {{ endfor }}.
+    """
+
+
+class Markup(str):
+    """
+    Text that is already HTML and must not be escaped again, e.g. a block built by a
+    helper. Any object with an __html__() method (such as markupsafe.Markup) is
+    inserted as-is too.
+    """
+    __slots__ = ()
+
+    def __html__(self):
+        return self
+
+
+def _escape_text(text):
+    # Five C-level passes over the whole string; much faster than str.translate() with
+    # multi-character replacements, which falls back to a per-character path
+    return (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&#34;').replace("'", '&#39;'))
+
+
+def escape(value):
+    """
+    Escapes a value for HTML and returns it as Markup. Values that are already HTML
+    (they have an __html__ method) are returned unchanged.
+    """
+    html = getattr(value, '__html__', None)
+    if html is not None:
+        return Markup(html())
+    return Markup(_escape_text(str(value)))
+
+
+def _to_html(value):
+    if type(value) is str:
+        return _escape_text(value)
+    html = getattr(value, '__html__', None)
+    if html is not None:
+        return html()
+    if isinstance(value, Iterator):
+        # e.g. a generator of rows; the same controller then works for streamed pages
+        return ''.join(escape_many(list(value)))
+    return _escape_text(str(value))
+
+
+def _iter_html(values):
+    # Escapes an iterator lazily, LOOP_BATCH_SIZE values at a time
+    while True:
+        batch = list(itertools.islice(values, LOOP_BATCH_SIZE))
+        if not batch:
+            return
+        yield ''.join(escape_many(batch))
+
+
+def _escape_joined(values):
+    """
+    Escapes a list of plain values in one pass: they are joined with _SEPARATOR,
+    escaped together and returned still joined. Returns None when that is not
+    possible, i.e. a value is already HTML or contains the separator itself.
+    """
+    kinds = set(map(type, values))
+    if kinds == {str}:
+        joined = _SEPARATOR.join(values)
+    elif any(hasattr(kind, '__html__') for kind in kinds):
+        return None
+    else:
+        joined = _SEPARATOR.join(map(str, values))
+    if joined.count(_SEPARATOR) != len(values) - 1:
+        return None
+    return _escape_text(joined)
+
+
+def escape_many(values):
+    """
+    Escapes a list of values for HTML, like [escape(v) for v in values] but in one
+    pass over their joined text instead of one call per value.
+    """
+    if not values:
+        return []
+    joined = _escape_joined(values)
+    if joined is None:
+        return [_to_html(value) for value in values]
+    return joined.split(_SEPARATOR)
+
+
+def _lookup(value, attributes):
+    """
+    Follows a dotted lookup: mappings by key, anything else by attribute (falling
+    back to the key, e.g. for sqlite3.Row).
+    """
+    for attribute in attributes:
+        if isinstance(value, Mapping):
+            value = value[attribute]
+            continue
+        try:
+            value = getattr(value, attribute)
+        except AttributeError:
+            value = value[attribute]
+    return value
+
+
+class Placeholder:
+    """
+    A {{ name }} or {{ name.attribute }} slot. Its value is HTML-escaped unless it
+    is Markup (see escape()).
+    """
+    __slots__ = ('name', 'head', 'attributes')
+
+    def __init__(self, name):
+        self.name = name
+        self.head, *attributes = name.split('.')
+        self.attributes = tuple(attributes)
+
+    def value(self, context):
+        value = context[self.head]
+        return _lookup(value, self.attributes) if self.attributes else value
+
+    def get(self, context):
+        """
+        Like value(), but returns _MISSING when the name, or one of its dotted keys
+        or attributes, is not there.
+        """
+        if self.head not in context:
+            return _MISSING
+        try:
+            return self.value(context)
+        except (KeyError, AttributeError, TypeError):
+            return _MISSING
+
+    def render(self, context):
+        """
+        Returns the escaped value, or None when the value is missing (the slot then
+        keeps its original {{ tag }} text, matching the previous behaviour).
+        """
+        value = self.get(context)
+        if value is _MISSING:
+            return None
+        return _to_html(value)
+
+    def stream(self, context):
+        value = self.get(context)
+        if value is _MISSING:
+            return None
+        if isinstance(value, Iterator):
+            return _iter_html(value)
+        return _to_html(value)
+
+    def column(self, items):
+        """
+        The lookup applied to every loop item, e.g. item.name for each item.
+        """
+        if not self.attributes:
+            return items
+        if len(self.attributes) == 1:
+            getter = operator.itemgetter if isinstance(items[0], Mapping) else operator.attrgetter
+            try:
+                return list(map(getter(self.attributes[0]), items))
+            except (AttributeError, KeyError, TypeError):
+                pass  # Mixed item types: look each one up on its own
+        return [_lookup(item, self.attributes) for item in items]
+
+
+class Loop:
+    """
+    A {{ for var in iterable }} ... {{ endfor }} block, compiled like a view into
+    literal chunks and slots. Rows are rendered a column at a time: every slot that
+    depends on the loop variable is looked up for all items and escaped in a single
+    pass, then the columns are interleaved with the literal chunks by slice
+    assignment and joined once, so a long listing costs a few passes over the
+    data instead of several calls per row.
+    """
+    __slots__ = ('var', 'iterable', 'parts', 'slots')
+
+    def __init__(self, var, iterable, parts, slots):
+        self.var = var
+        self.iterable = Placeholder(iterable)
+        self.parts = parts    # Literal chunks alternating with slots: parts[1], parts[3], ... are slots
+        self.slots = slots    # List of (index into parts, Placeholder or nested Loop)
+
+    def render(self, context):
+        items = self.iterable.get(context)
+        if items is _MISSING:
+            return ''
+        return self.render_items(list(items), context)
+
+    def stream(self, context):
+        """
+        Renders the rows in batches of LOOP_BATCH_SIZE items, so an iterable that is a
+        generator is consumed lazily.
+        """
+        items = self.iterable.get(context)
+        if items is _MISSING:
+            return
+        items = iter(items)
+        while True:
+            batch = list(itertools.islice(items, LOOP_BATCH_SIZE))
+            if not batch:
+                return
+            yield self.render_items(batch, context)
+
+    def render_items(self, items, context):
+        count = len(items)
+        if not count:
+            return ''
+        parts = self.parts
+        if len(self.slots) == 1:
+            node = self.slots[0][1]
+            if type(node) is Placeholder and node.head == self.var:
+                # The common <li>{{ item }}</li> case: escape the joined column, then turn
+                # each separator into the literal text between two rows
+                joined = _escape_joined(node.column(items))
+                if joined is not None:
+                    return parts[0] + joined.replace(_SEPARATOR, parts[2] + parts[0]) + parts[2]
+
+        stride = len(parts)
+        cells = [None] * (count * stride)
+        for position in range(0, stride, 2):
+            cells[position::stride] = [parts[position]] * count
+        for index, node in self.slots:
+            if type(node) is Loop:
+                column = [node.render({**context, self.var: item}) for item in items]
+            elif node.head == self.var:
+                column = escape_many(node.column(items))
+            else:
+                text = node.render(context)
+                column = [parts[index] if text is None else text] * count
+            cells[index::stride] = column
+        return ''.join(cells)
+
+
+class CompiledTemplate:
+    """
+    A view that has been parsed once into literal chunks, placeholder slots and loops.
+    Rendering fills the slots from the context and joins the chunks together.
+    """
+    def __init__(self, view_path, parts, slots, sources, partials):
+        self.view_path = view_path
+        self.parts = parts        # Literal chunks, with the original tag text sitting in each slot position
+        self.slots = slots        # List of (index into parts, Placeholder or Loop)
+        self.sources = sources    # Mapping of view file path -> mtime
+        self.partials = partials  # Every partial name this view includes, directly or nested
+
+    def render(self, context):
+        """
+        Fills every slot from the context, HTML-escaping the values. Unknown
+        placeholders keep their original {{ tag }} text, matching the previous behaviour.
+        """
+        parts = self.parts[:]
+        for index, node in self.slots:
+            text = node.render(context)
+            if text is not None:
+                parts[index] = text
+        return ''.join(parts)
+
+    def stream(self, context, chunk_size=None):
+        """
+        Renders the template as a generator of chunks. Literal text is buffered up to
+        chunk_size characters; loops and context values that are iterators (e.g.
+        generators) are consumed lazily, and everything before them is flushed first
+        so the client receives the <head> before the expensive part of the page is produced.
+        """
+        chunk_size = chunk_size or STREAM_CHUNK_SIZE
+        slot_nodes = dict(self.slots)
+        buffer = []
+        size = 0
+        for index, part in enumerate(self.parts):
+            node = slot_nodes.get(index)
+            if node is not None:
+                text = node.stream(context)
+                if isinstance(text, Iterator):
+                    if size:
+                        yield ''.join(buffer)
+                        buffer = []
+                        size = 0
+                    for chunk in text:
+                        buffer.append(chunk)
+                        size += len(chunk)
+                        if size >= chunk_size:
+                            yield ''.join(buffer)
+                            buffer = []
+                            size = 0
+                    continue
+                if text is not None:
+                    part = text
+            buffer.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
+
+
+def _parse(view_path, content):
+    """
+    Splits expanded view content into literal chunks and slots, with loop bodies
+    compiled recursively. Returns (parts, slots).
+    """
+    parts, slots = [], []
+    stack = []  # (parts, slots) of the enclosing blocks, and the tag that opened the current one
+    position = 0
+    for match in TAG_PATTERN.finditer(content):
+        parts.append(content[position:match.start()])
+        position = match.end()
+        kind = match.lastgroup
+        if kind == 'name':
+            slots.append((len(parts), Placeholder(match.group('name'))))
+            parts.append(match.group(0))
+        elif kind == 'iterable':
+            stack.append((parts, slots, match))
+            parts, slots = [], []
+        else:
+            if not stack:
+                raise TemplateSyntaxError(f"'{view_path}' line {_line(content, match.start())}: {{{{ endfor }}}} without a {{{{ for }}}}")
+            loop = Loop(stack[-1][2].group('var'), stack[-1][2].group('iterable'), parts, slots)
+            parts, slots, opening = stack.pop()
+            slots.append((len(parts), loop))
+            parts.append(content[opening.start():match.end()])
+    if stack:
+        opening = stack[-1][2]
+        raise TemplateSyntaxError(f"'{view_path}' line {_line(content, opening.start())}: {opening.group(0)} is never closed by {{{{ endfor }}}}")
+    parts.append(content[position:])
+    return parts, slots
+
+
+def _line(content, offset):
+    return content.count('\n', 0, offset) + 1
+
+
+def stream_response(func):
+    """
+    Decorator for controller methods whose page should be streamed to the client
+    in chunks instead of being built as one string (e.g. very long listings).
+    Context values may then be generators, which are consumed as the response is sent.
+    """
+    func.stream_response = True
+    return func
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Partial:
+    """
+    A partial file held in the index: its raw content and the partials it includes.
+    A missing partial is kept too (content None), so it can be picked up once it appears.
+    """
+    def __init__(self, name, path, content, mtime):
+        self.name = name
+        self.path = path
+        self.content = content
+        self.mtime = mtime
+        self.includes = [] if content is None else [m.group(1).strip() for m in PARTIAL_PATTERN.finditer(content)]
+
+
+class PartialIndex:
+    """
+    Maps partial names (e.g. 'home/partials/header') to their contents. Every
+    views/**/partials/*.html file is loaded by build(); anything else referenced by a
+    {{ partials/... }} tag is loaded from disk the first time it is needed.
+    The reloader thread updates the index while requests read it, so every access
+    holds the index's lock.
+    """
+    def __init__(self, views_dir):
+        self.views_dir = views_dir
+        self._partials = {}
+        self._lock = threading.RLock()
+
+    def path_for(self, name):
+        return os.path.join(self.views_dir, *name.split('/')) + '.html'
+
+    def build(self):
+        """
+        Scans the views directory for partials and loads them all into the index.
+        """
+        with self._lock:
+            self._partials.clear()
+            for root, dirs, files in os.walk(self.views_dir):
+                if os.path.basename(root) != 'partials':
+                    continue
+                for filename in files:
+                    if filename.endswith('.html'):
+                        relative = os.path.relpath(os.path.join(root, filename[:-5]), self.views_dir)
+                        self.load(relative.replace(os.sep, '/'))
+            count = len(self._partials)
+        logger.info(f"Indexed {count} partials under '{self.views_dir}'.")
+
+    def load(self, name):
+        """
+        (Re)reads a partial from disk and stores it in the index.
+        """
+        path = self.path_for(name)
+        mtime = _mtime(path)
+        try:
+            with open(path, 'r') as p_f:
+                content = p_f.read()
+        except FileNotFoundError:
+            content = None
+        partial = Partial(name, path, content, mtime)
+        with self._lock:
+            self._partials[name] = partial
+        return partial
+
+    def get(self, name):
+        with self._lock:
+            partial = self._partials.get(name)
+            if partial is None:
+                partial = self.load(name)
+            return partial
+
+    def refresh(self, name):
+        """
+        Reloads a partial if its mtime has changed. Returns True when it was reloaded.
+        """
+        with self._lock:
+            partial = self._partials.get(name)
+            if partial is not None and _mtime(partial.path) == partial.mtime:
+                return False
+            self.load(name)
+            return True
+
+    def expand(self, content, used=None):
+        """
+        Includes every {{ partials/... }} tag in content, including nested partials.
+        The output is built in a single pass over each source, so it is linear in the
+        size of the result. Names of the included partials are added to used.
+        A partial that (indirectly) includes itself is reported and left out.
+        """
+        if used is None:
+            used = set()
+        chunks = []
+        with self._lock:
+            self._expand_into(content, chunks, used, [])
+        return ''.join(chunks)
+
+    def _expand_into(self, content, chunks, used, stack):
+        position = 0
+        for match in PARTIAL_PATTERN.finditer(content):
+            chunks.append(content[position:match.start()])
+            position = match.end()
+            name = match.group(1).strip()
+            used.add(name)
+
+            if name in stack:
+                cycle = ' -> '.join(stack[stack.index(name):] + [name])
+                logger.error(f"Partial include cycle detected: {cycle}")
+                chunks.append(f"<!-- Partial '{name}.html' includes itself ({cycle}) -->")
+                continue
+
+            partial = self.get(name)
+            if partial.content is None:
+                logger.warning(f"Partial '{name}.html' not found at '{partial.path}'.")
+                chunks.append(f"<!-- Partial '{name}.html' not found -->")
+                continue
+
+            stack.append(name)
+            self._expand_into(partial.content, chunks, used, stack)
+            stack.pop()
+        chunks.append(content[position:])
+
+
+class TemplateCache:
+    """
+    Compiles views (with their partials) into CompiledTemplate objects and keeps
+    them in memory, along with a dependency graph of which views include which
+    partials. A view is recompiled only when its own file changes or when one of
+    the partials it depends on changes. In frozen mode the files are never stat'ed again.
+
+    Lookups and invalidation share one lock, since the reloader thread invalidates
+    views while request threads look them up; rendering happens outside of it.
+    """
+    def __init__(self, views_dir, frozen=False):
+        self.views_dir = views_dir
+        self.frozen = frozen
+        self.partials = PartialIndex(views_dir)
+        self.partials.build()
+        self._compiled = {}
+        self._dependents = {}  # partial name -> set of view paths that include it
+        self._lock = threading.RLock()
+
+    def get(self, view_path):
+        """
+        Returns the CompiledTemplate for view_path, compiling it on first use or
+        when one of its source files has changed on disk.
+        Raises FileNotFoundError if the view itself does not exist.
+        """
+        with self._lock:
+            template = self._compiled.get(view_path)
+            if template is not None and (self.frozen or not self._is_stale(template)):
+                return template
+
+            template = self.compile(view_path)
+            self._store(template)
+            return template
+
+    def render(self, view_path, context):
+        return self.get(view_path).render(context)
+
+    def view_paths(self):
+        """
+        Every view under the views directory (partials excluded), e.g. 'home/index.html'.
+        """
+        paths = []
+        for root, dirs, files in os.walk(self.views_dir):
+            dirs[:] = [d for d in dirs if d != 'partials']
+            for filename in files:
+                if filename.endswith('.html'):
+                    relative = os.path.relpath(os.path.join(root, filename), self.views_dir)
+                    paths.append(relative.replace(os.sep, '/'))
+        return sorted(paths)
+
+    def compile_all(self):
+        """
+        Compiles every view up front, e.g. in the gunicorn master before it forks.
+        Returns the number of compiled views.
+        """
+        for view_path in self.view_paths():
+            self.get(view_path)
+        with self._lock:
+            return len(self._compiled)
+
+    def stream(self, view_path, context, chunk_size=None):
+        return self.get(view_path).stream(context, chunk_size)
+
+    def dependents(self, partial_name):
+        """
+        Returns the view paths that include the given partial, directly or nested.
+        """
+        with self._lock:
+            return set(self._dependents.get(partial_name, ()))
+
+    def partial_changed(self, partial_name):
+        """
+        Reloads a partial and drops only the compiled views that depend on it.
+        """
+        with self._lock:
+            self.partials.load(partial_name)
+            for view_path in self.dependents(partial_name):
+                self.invalidate(view_path)
+
+    def invalidate(self, view_path=None):
+        """
+        Drops one compiled view, or every compiled view when view_path is None.
+        """
+        with self._lock:
+            if view_path is None:
+                self._compiled.clear()
+                self._dependents.clear()
+                return
+            template = self._compiled.pop(view_path, None)
+            if template is not None:
+                for name in template.partials:
+                    self._dependents.get(name, set()).discard(view_path)
+
+    def _store(self, template):
+        # Called with the lock held (see get)
+        self.invalidate(template.view_path)
+        self._compiled[template.view_path] = template
+        for name in template.partials:
+            self._dependents.setdefault(name, set()).add(template.view_path)
+
+    def _is_stale(self, template):
+        for path, mtime in template.sources.items():
+            if _mtime(path) != mtime:
+                return True
+        stale = False
+        for name in template.partials:
+            if self.partials.refresh(name):
+                logger.info(f"Partial '{name}' changed, recompiling dependent views.")
+                for view_path in self.dependents(name):
+                    if view_path != template.view_path:
+                        self.invalidate(view_path)
+                stale = True
+        return stale
+
+    def compile(self, view_path):
+        started = time.perf_counter()
+        full_path = os.path.join(self.views_dir, view_path)
+        sources = {full_path: _mtime(full_path)}
+        with open(full_path, 'r') as f:
+            content = f.read()
+
+        used = set()
+        content = self.partials.expand(content, used)
+        parts, slots = _parse(view_path, content)
+        # Only requests that (re)compile a view record this stage
+        metrics.record('compile', time.perf_counter() - started)
+
+        logger.info(f"Compiled view '{view_path}' ({len(slots)} placeholders, {len(used)} partials).")
+        return CompiledTemplate(view_path, parts, slots, sources, frozenset(used))
@@ -0,0 +1,123 @@
+# gunicorn.conf.py
+# Production serving profile: gunicorn -c gunicorn.conf.py
+# Every setting can be overridden from the environment (MVC_*), or on the command line.
+import os
+import shutil
+import tempfile
+
+
+def _cpu_count():
+    # CPUs this process may run on (respects container cpusets), not the host's total
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _runtime_dir():
+    """
+    A private directory (mode 0700) for this deploy's shared state, on /dev/shm when
+    available: a tmpfs, so files there live in shared memory. Created once per master
+    process; a config reload (HUP) keeps it, a new master (USR2) gets its own.
+    """
+    if os.environ.get('MVC_RUNTIME_DIR_OWNER') == str(os.getpid()):
+        return os.environ['MVC_RUNTIME_DIR']
+    inherited = os.environ.get('MVC_RUNTIME_DIR')
+    if inherited:
+        # Set by the previous master; do not keep using its directories
+        for variable in ('MVC_RESPONSE_CACHE_DIR', 'MVC_METRICS_DIR'):
+            if os.environ.get(variable, '').startswith(inherited + os.sep):
+                del os.environ[variable]
+    directory = tempfile.mkdtemp(prefix='mvc-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    os.environ['MVC_RUNTIME_DIR'] = directory
+    os.environ['MVC_RUNTIME_DIR_OWNER'] = str(os.getpid())
+    return directory
+
+
+cpus = _cpu_count()
+
+# sync: one request per worker process, 2 x CPUs + 1 workers (the app is mostly CPU-bound rendering)
+# gthread: fewer processes with MVC_THREADS threads each, for controllers that wait on I/O
+# asgi: uvicorn workers serving asgi.py, for async def controllers (needs uvicorn installed)
+worker_profile = os.environ.get('MVC_WORKER_CLASS', 'sync')
+wsgi_app = 'wsgi:application'
+threads = 1
+
+if worker_profile == 'gthread':
+    worker_class = 'gthread'
+    workers = cpus + 1
+    threads = int(os.environ.get('MVC_THREADS', '4'))
+elif worker_profile == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = cpus
+    wsgi_app = 'asgi:application'
+elif worker_profile == 'sync':
+    worker_class = 'sync'
+    workers = 2 * cpus + 1
+else:
+    raise ValueError(f"MVC_WORKER_CLASS must be 'sync', 'gthread' or 'asgi', not {worker_profile!r}")
+
+workers = int(os.environ.get('MVC_WORKERS', workers))
+bind = os.environ.get('MVC_BIND', '0.0.0.0:8000')
+
+# Hot reload is for development only: its watcher thread would start in the preloading
+# master, is not inherited by the forked workers, and they render frozen templates.
+if os.environ.get('MVC_RELOAD') == '1':
+    raise ValueError("MVC_RELOAD=1 is not supported by the gunicorn profile; use `MVC_RELOAD=1 python runserver.py`")
+
+# Import the app, its controllers, routes and compiled views once in the master; the
+# forked workers share that memory copy-on-write and serve their first request warm.
+preload_app = True
+os.environ.setdefault('MVC_PRELOAD', '1')
+os.environ.setdefault('MVC_FROZEN_TEMPLATES', '1')
+
+# Recycle each worker after about this many requests to bound memory growth; the
+# jitter keeps the workers from all restarting at the same moment.
+max_requests = int(os.environ.get('MVC_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('MVC_MAX_REQUESTS_JITTER', str(max_requests // 10)))
+
+timeout = int(os.environ.get('MVC_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# Page cache and metrics shared by all workers of this deploy, so a page rendered by
+# one worker is a cache hit in the others and survives worker recycling. The
+# directory is removed again when the master exits (on_exit below).
+runtime_dir = _runtime_dir()
+os.environ.setdefault('MVC_RESPONSE_CACHE_DIR', os.path.join(runtime_dir, 'cache'))
+os.environ.setdefault('MVC_METRICS_DIR', os.path.join(runtime_dir, 'metrics'))
+
+# Workers get their own copy of this temporary file for heartbeats; keep it off disk too
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+errorlog = '-'
+loglevel = os.environ.get('MVC_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    server.log.info(
+        f"Serving {wsgi_app} with {workers} {worker_class} workers"
+        + (f" x {threads} threads" if threads > 1 else "")
+        + f" on {cpus} CPUs (max_requests={max_requests}, jitter={max_requests_jitter})"
+    )
+
+
+def worker_exit(server, worker):
+    # Write the final snapshot, including requests since the last periodic flush
+    from core.metrics import metrics
+    if metrics.directory:
+        metrics.flush()
+
+
+def child_exit(server, worker):
+    # Fold the exited worker's metrics into one retired snapshot, so recycled
+    # workers do not leave a file each behind
+    from core.metrics import retire_worker
+    directory = os.environ.get('MVC_METRICS_DIR')
+    if directory:
+        retire_worker(directory, worker.pid)
+
+
+def on_exit(server):
+    if os.environ.get('MVC_RUNTIME_DIR_OWNER') == str(os.getpid()):
+        shutil.rmtree(os.environ['MVC_RUNTIME_DIR'], ignore_errors=True)
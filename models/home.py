@@ -4,4 +4,5 @@ from core.db import db
 
 class HomeModel:
     def get_home_page_data(self):
+        # db.get_data is already a @cached_query, so this needs no cache of its own
         return db.get_data("home_page_data")
@@ -1,32 +1,33 @@
 # models/user.py
 
-# Assuming core.db provides a way to interact with a database or data source
-# For this example, we'll simulate data retrieval.
-# In a real application, 'db' would be an actual database connection/ORM.
-from core.db import db # Keep this import if core.db exists and works as intended
+from core.db import db
+from core.loader import request_loader
 
 class UserModel:
     def get_user_page_data(self):
         """
         Retrieves data relevant for the user index page.
-        In a real application, this would query a database for user information.
-        """
-        # Simulate fetching data from a 'database' or data source
-        # This 'db' object and its 'get_data' method are placeholders.
-        # You would replace this with actual database queries (e.g., using SQLAlchemy, raw SQL, etc.)
-        # For now, let's return some mock user data.
-        mock_user_data = {
-            "title": "User List",
-            "message": "Welcome to the user management section!",
-            "items": ["Alice Smith", "Bob Johnson", "Charlie Brown"]
-        }
-        return mock_user_data
+        The data lives in the 'collections' table (see core/db.py); db.get_data caches it.
+        """
+        return db.get_data("user_page_data")
 
-    # If you add a show method to UserController, you'd need a corresponding model method:
-    # def get_user_details(self, user_id):
-    #     # Simulate fetching details for a specific user
-    #     users_db = {
-    #         "1": {"name": "Alice Smith", "email": "alice@example.com"},
-    #         "2": {"name": "Bob Johnson", "email": "bob@example.com"}
-    #     }
-    #     return users_db.get(user_id, {"name": "User Not Found", "email": "N/A"})
+    def get_many(self, user_ids):
+        """
+        Fetches several users with one query. Returns a dict of user id -> Row
+        (with .id, .name and .email); unknown ids are left out.
+        """
+        return db.get_many("users", [int(user_id) for user_id in user_ids])
+
+    def load_user(self, user_id):
+        """
+        Queues a user lookup on the request's batch loader and returns a Deferred.
+        When a page shows many users, queue them all first; the first .value read
+        then fetches every queued user in one query instead of one query per row.
+        """
+        return request_loader("users", self.get_many).load(int(user_id))
+
+    def get_user_details(self, user_id):
+        """
+        Returns one user as a Row, or None if there is no such user.
+        """
+        return self.load_user(user_id).value
@@ -1,21 +1,32 @@
 # runserver.py
+# Flask wrapper around the MVC app, for development and for anyone who needs Flask
+# extensions. Production serving uses the native WSGI callable instead (see wsgi.py).
 from core.app import App
-from flask import Flask, Response
+from core.metrics import metrics
+from flask import Flask, Response, request
 import os
 
 app = Flask(__name__)
 mvc_app = App(base_dir=os.path.dirname(os.path.abspath(__file__)))
 
+@app.route("/metrics")
+def metrics_endpoint():
+    # Prometheus text format, summed over all workers when MVC_METRICS_DIR is set
+    return Response(metrics.render_prometheus(), content_type="text/plain; version=0.0.4")
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def handle_all(path):
     path = "/" + path
-    response = mvc_app.handle_request(path)
-    if response.startswith("<!DOCTYPE html>"):
-        return Response(response, content_type="text/html")
-    else:
-        return response, 404 if "Not Found" in response else 500
+    # Streamed pages pass their chunks through; complete 200 pages get an ETag, so
+    # revalidations with If-None-Match get a bodiless 304, and are gzip/brotli
+    # compressed when the client accepts it
+    response = mvc_app.dispatch(path, stream=request.method == "GET").make_conditional(request.headers)
+    if mvc_app.compression:
+        response.compress(request.headers)
+    return Response(response.body, status=response.status, headers=response.headers)
 
 if __name__ == "__main__":
-    # Dev only
-    app.run(host="0.0.0.0", port=3000, debug=True)
+    # Dev only. With MVC_RELOAD=1 the app's own watcher applies changes in place, so
+    # Werkzeug's reloader (which restarts the whole process) stays off.
+    app.run(host="0.0.0.0", port=3000, debug=True, use_reloader=mvc_app.reloader is None)
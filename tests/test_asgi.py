@@ -0,0 +1,76 @@
+# tests/test_asgi.py
+
+import asyncio
+import unittest
+
+from asgi import application, mvc_app
+from core.template import stream_response
+
+
+class StreamController:
+    @stream_response
+    def index(self, render_template_func):
+        return 'home/index.html', {'page_title': 'Streamed', 'items': (f"Row {i}" for i in range(3))}
+
+
+def request(method, path, headers=()):
+    """
+    Runs one HTTP request through the ASGI application.
+    Returns (status, headers dict, body bytes).
+    """
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start = messages[0]
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], headers, body
+
+
+class ASGIApplicationTest(unittest.TestCase):
+    def test_get_renders_the_page(self):
+        status, headers, body = request('GET', '/home/index')
+        self.assertEqual(status, 200)
+        self.assertIn(b'<html', body)
+
+    def test_head_sends_no_body(self):
+        status, headers, body = request('HEAD', '/home/index')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'')
+
+    def test_other_methods_are_not_allowed(self):
+        for method in ('POST', 'PUT', 'DELETE', 'PATCH'):
+            with self.subTest(method=method):
+                status, headers, body = request(method, '/home/index')
+                self.assertEqual(status, 405)
+                self.assertEqual(headers['allow'], 'GET, HEAD')
+                self.assertEqual(body, b'405 Method Not Allowed')
+
+
+class ASGIStreamingTest(unittest.TestCase):
+    def setUp(self):
+        mvc_app.router.add_controller('stream', StreamController())
+        self.addCleanup(mvc_app.router.remove_controller, 'stream')
+
+    def test_streamed_page_is_sent_in_chunks(self):
+        status, headers, body = request('GET', '/stream/index')
+        self.assertEqual(status, 200)
+        self.assertNotIn('content-length', headers)
+        self.assertIn(b'<li>Row 2</li>', body)
+        self.assertTrue(body.rstrip().endswith(b'</html>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
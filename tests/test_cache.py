@@ -0,0 +1,20 @@
+# tests/test_cache.py
+
+import unittest
+
+from core.cache import MemoryBackend
+
+
+class MemoryBackendTest(unittest.TestCase):
+    def test_oversized_value_replaces_the_cached_one(self):
+        backend = MemoryBackend(max_bytes=10)
+        backend.set('/home/index', 'old page')
+        self.assertEqual(backend.get('/home/index'), 'old page')
+
+        backend.set('/home/index', 'a much larger page')
+        self.assertIsNone(backend.get('/home/index'))
+        self.assertEqual(backend.keys(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
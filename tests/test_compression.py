@@ -0,0 +1,102 @@
+# tests/test_compression.py
+
+import os
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+
+from core.compression import CompressedCache, negotiate, precompress_views
+from core.conditional import compute_etag
+from core.response import Response
+from core.template import TemplateCache
+
+PAGE = '<html><body>' + 'compressible ' * 200 + '</body></html>'
+
+
+class NegotiateTest(unittest.TestCase):
+    def test_no_header_means_identity(self):
+        self.assertIsNone(negotiate(None))
+        self.assertIsNone(negotiate(''))
+
+    def test_q_zero_refuses_an_encoding(self):
+        self.assertIsNone(negotiate('gzip;q=0'))
+        self.assertIsNone(negotiate('gzip; q=0, identity'))
+
+    def test_wildcard(self):
+        self.assertEqual(negotiate('*'), negotiate('br, gzip'))
+        with mock.patch('core.compression.ENCODINGS', ('br', 'gzip')):
+            self.assertEqual(negotiate('*, br;q=0'), 'gzip')
+            self.assertIsNone(negotiate('*;q=0'))
+
+    def test_highest_q_wins(self):
+        with mock.patch('core.compression.ENCODINGS', ('br', 'gzip')):
+            self.assertEqual(negotiate('br;q=0.5, gzip;q=0.8'), 'gzip')
+            self.assertEqual(negotiate('gzip, br'), 'br')
+
+    def test_without_brotli_only_gzip_is_offered(self):
+        with mock.patch('core.compression.ENCODINGS', ('gzip',)):
+            self.assertIsNone(negotiate('br'))
+            self.assertEqual(negotiate('br, gzip;q=0.5'), 'gzip')
+            self.assertEqual(negotiate('*'), 'gzip')
+
+
+class ResponseCompressTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('core.response.compressed_cache', CompressedCache())
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_compressed_body_gets_a_weak_etag(self):
+        etag = compute_etag(PAGE)
+        response = Response(PAGE).make_conditional({}).compress({'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.headers['ETag'], 'W/' + etag)
+        self.assertEqual(gzip.decompress(response.body).decode('utf-8'), PAGE)
+
+    def test_same_page_is_compressed_once(self):
+        for _ in range(3):
+            Response(PAGE).make_conditional({}).compress({'Accept-Encoding': 'gzip'})
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 2))
+
+    def test_304_for_a_compressed_page_keeps_the_weak_etag(self):
+        etag = compute_etag(PAGE)
+        request = {'If-None-Match': 'W/' + etag, 'Accept-Encoding': 'gzip'}
+        response = Response(PAGE).make_conditional(request).compress(request)
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.headers['ETag'], 'W/' + etag)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+
+    def test_small_bodies_are_sent_as_is(self):
+        response = Response('<p>small</p>').make_conditional({}).compress({'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.body, '<p>small</p>')
+
+
+class PrecompressedViewsTest(unittest.TestCase):
+    def test_precompressed_view_is_served_from_the_cache(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        views_dir = os.path.join(directory.name, 'views')
+        output_dir = os.path.join(directory.name, 'compressed')
+        os.makedirs(views_dir)
+        with open(os.path.join(views_dir, 'static.html'), 'w') as f:
+            f.write(PAGE)
+        with open(os.path.join(views_dir, 'dynamic.html'), 'w') as f:
+            f.write(PAGE.replace('<body>', '<body>{{ name }}'))
+
+        with mock.patch('core.compression.ENCODINGS', ('gzip',)):
+            self.assertEqual(precompress_views(views_dir, output_dir), ['static.html'])
+            cache = CompressedCache()
+            self.assertEqual(cache.load(output_dir), 1)
+
+        body = TemplateCache(views_dir, frozen=True).render('static.html', {})
+        with mock.patch('core.response.compressed_cache', cache):
+            response = Response(body).make_conditional({}).compress({'Accept-Encoding': 'gzip'})
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(gzip.decompress(response.body).decode('utf-8'), PAGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
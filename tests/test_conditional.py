@@ -0,0 +1,94 @@
+# tests/test_conditional.py
+
+import os
+import unittest
+
+from core.app import App
+from core.conditional import compute_etag, etag_matches
+from core.response import Response
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGE = '<html><body>' + 'x' * 2000 + '</body></html>'
+
+
+class EtagMatchesTest(unittest.TestCase):
+    def setUp(self):
+        self.etag = compute_etag(PAGE)
+
+    def test_exact_match(self):
+        self.assertTrue(etag_matches(self.etag, self.etag))
+
+    def test_list_of_etags(self):
+        self.assertTrue(etag_matches(f'"other", {self.etag} , "third"', self.etag))
+        self.assertFalse(etag_matches('"other", "third"', self.etag))
+
+    def test_star_matches_anything(self):
+        self.assertTrue(etag_matches('*', self.etag))
+        self.assertTrue(etag_matches(' * ', self.etag))
+
+    def test_weak_etag_matches_its_strong_form(self):
+        self.assertTrue(etag_matches('W/' + self.etag, self.etag))
+        self.assertTrue(etag_matches(f'"other", W/{self.etag}', self.etag))
+
+
+class MakeConditionalTest(unittest.TestCase):
+    def test_200_gets_an_etag(self):
+        response = Response(PAGE).make_conditional({})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers['ETag'], compute_etag(PAGE))
+
+    def test_matching_request_gets_a_bodiless_304(self):
+        etag = compute_etag(PAGE)
+        for if_none_match in (etag, 'W/' + etag, f'"other", {etag}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                response = Response(PAGE).make_conditional({'If-None-Match': if_none_match})
+                self.assertEqual(response.status, 304)
+                self.assertEqual(response.body, '')
+                self.assertEqual(response.headers['ETag'], etag)
+                self.assertNotIn('Content-Type', response.headers)
+
+    def test_stale_etag_gets_the_page(self):
+        response = Response(PAGE).make_conditional({'If-None-Match': '"stale"'})
+        self.assertEqual((response.status, response.body), (200, PAGE))
+
+    def test_errors_and_streams_are_left_alone(self):
+        response = Response('missing', status=404).make_conditional({'If-None-Match': '*'})
+        self.assertEqual(response.status, 404)
+        self.assertNotIn('ETag', response.headers)
+        response = Response(iter([PAGE])).make_conditional({'If-None-Match': '*'})
+        self.assertEqual(response.status, 200)
+        self.assertNotIn('ETag', response.headers)
+
+
+class WSGIRevalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.app = App(base_dir=BASE_DIR)
+
+    def get(self, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/home/index', **headers}
+        started = {}
+
+        def start_response(status, response_headers):
+            started['status'] = status
+            started['headers'] = dict(response_headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return started['status'], started['headers'], body
+
+    def test_304_has_no_body_and_no_content_length(self):
+        status, headers, body = self.get()
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+
+        for etag in (headers['ETag'], 'W/' + headers['ETag'].removeprefix('W/')):
+            with self.subTest(etag=etag):
+                status, revalidated, body = self.get(HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(status, '304 Not Modified')
+                self.assertEqual(body, b'')
+                self.assertNotIn('Content-Length', revalidated)
+                self.assertEqual(revalidated['ETag'], headers['ETag'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_db.py
+
+import os
+import tempfile
+import unittest
+
+from core.cache import query_cache
+from core.db import Database, SQLiteDriver
+
+
+class CachedQueryPerDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        query_cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.databases = []
+
+    def tearDown(self):
+        for database in self.databases:
+            database.pool.close_all()
+        self.directory.cleanup()
+        query_cache.clear()
+
+    def database(self, name):
+        database = Database(SQLiteDriver(os.path.join(self.directory.name, name)))
+        self.databases.append(database)
+        return database
+
+    def test_databases_with_different_data_do_not_share_results(self):
+        a = self.database('a.db')
+        b = self.database('b.db')
+        a.set_data('x', {'source': 'a'})
+        b.set_data('x', {'source': 'b'})
+
+        self.assertEqual(a.get_data('x'), {'source': 'a'})
+        self.assertEqual(b.get_data('x'), {'source': 'b'})
+        # Second reads come from the cache, still per database
+        self.assertEqual(a.get_data('x'), {'source': 'a'})
+        self.assertEqual(b.get_data('x'), {'source': 'b'})
+
+    def test_databases_on_the_same_file_share_results(self):
+        a = self.database('shared.db')
+        a.set_data('x', {'source': 'shared'})
+        self.assertEqual(a.get_data('x'), {'source': 'shared'})
+        hits = query_cache.hits
+
+        b = self.database('shared.db')
+        self.assertEqual(b.get_data('x'), {'source': 'shared'})
+        self.assertEqual(query_cache.hits, hits + 1)
+
+
+class InMemoryDatabaseTest(unittest.TestCase):
+    def test_data_survives_the_pool_dropping_every_connection(self):
+        database = Database(SQLiteDriver())
+        database.set_data('kept', {'value': 1})
+        database.pool.close_all()
+        self.assertEqual(database.pool.stats()['size'], 0)
+
+        rows = database.query("SELECT data FROM collections WHERE name = ?", ('kept',))
+        self.assertEqual(rows[0][0], '{"value": 1}')
+        database.pool.close_all()
+
+
+class GetManyTest(unittest.TestCase):
+    def test_key_column_renamed_in_the_row_class(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = Database(SQLiteDriver(os.path.join(directory.name, 'rows.db')))
+        self.addCleanup(database.pool.close_all)
+        database.execute("CREATE TABLE items (_id INTEGER PRIMARY KEY, label TEXT)")
+        database.execute("INSERT INTO items (_id, label) VALUES (1, 'one'), (2, 'two')")
+
+        rows = database.get_many('items', [2, 1, 3], key='_id')
+        self.assertEqual({key: row.label for key, row in rows.items()}, {1: 'one', 2: 'two'})
+
+
+if __name__ == '__main__':
+    unittest.main()
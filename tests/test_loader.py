@@ -0,0 +1,52 @@
+# tests/test_loader.py
+
+import unittest
+from unittest import mock
+
+from core.cache import request_scope
+from core.db import db
+from core.loader import BatchLoader, request_loader
+from models.user import UserModel
+
+
+class BatchLoaderTest(unittest.TestCase):
+    def test_queued_keys_are_fetched_in_one_batch(self):
+        calls = []
+
+        def fetch(keys):
+            calls.append(keys)
+            return {key: key * 10 for key in keys if key != 3}
+
+        loader = BatchLoader(fetch)
+        deferred = [loader.load(key) for key in (1, 2, 3, 2)]
+        self.assertEqual(calls, [])
+
+        self.assertEqual([d.value for d in deferred], [10, 20, None, 20])
+        self.assertEqual(calls, [[1, 2, 3]])
+        # Loaded keys are never fetched again
+        self.assertEqual(loader.load_many([1, 4]), [10, 40])
+        self.assertEqual(calls, [[1, 2, 3], [4]])
+
+
+class RequestLoaderTest(unittest.TestCase):
+    def test_user_loads_become_one_get_many_query(self):
+        model = UserModel()
+        with mock.patch.object(db, 'get_many', wraps=db.get_many) as get_many, request_scope():
+            deferred = [model.load_user(user_id) for user_id in (1, 2, 3, 999)]
+            users = [d.value for d in deferred]
+            loader = request_loader('users', model.get_many)
+
+        self.assertEqual([user.name if user else None for user in users], ['Alice Smith', 'Bob Johnson', 'Charlie Brown', None])
+        self.assertEqual(loader.batches, 1)
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_each_request_gets_its_own_loader(self):
+        with request_scope():
+            first = request_loader('users', dict)
+            self.assertIs(request_loader('users', dict), first)
+        with request_scope():
+            self.assertIsNot(request_loader('users', dict), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
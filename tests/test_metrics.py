@@ -0,0 +1,55 @@
+# tests/test_metrics.py
+
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+from core.metrics import Metrics, RETIRED_SNAPSHOT, _write_snapshot
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@unittest.skipIf(os.name != 'posix', "stale snapshots are only retired on POSIX")
+class StaleSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_worker(self, pid, responses):
+        snapshot = {'histograms': [], 'counters': [[['mvc_responses_total', '200'], responses]], 'caches': []}
+        _write_snapshot(os.path.join(self.directory.name, f"{pid}.json"), snapshot)
+
+    def test_dead_workers_are_retired_at_startup(self):
+        pid = dead_pid()
+        self.write_worker(pid, 5)
+        self.write_worker(os.getppid(), 2)  # alive
+
+        metrics = Metrics(self.directory.name)
+        names = set(os.listdir(self.directory.name))
+        self.assertNotIn(f"{pid}.json", names)
+        self.assertIn(f"{os.getppid()}.json", names)
+        self.assertIn(RETIRED_SNAPSHOT, names)
+
+        histograms, counters, caches = metrics.aggregate()
+        self.assertEqual(counters[('mvc_responses_total', '200')], 7)
+
+    def test_dead_workers_are_retired_on_scrape(self):
+        metrics = Metrics(self.directory.name)
+        for responses in (3, 4):
+            self.write_worker(dead_pid(), responses)
+        histograms, counters, caches = metrics.aggregate()
+        self.assertEqual(counters[('mvc_responses_total', '200')], 7)
+        self.assertEqual(sorted(name for name in os.listdir(self.directory.name) if name.endswith('.json')),
+                         sorted([RETIRED_SNAPSHOT, f"{os.getpid()}.json"]))
+        # Retired once: a second scrape gives the same totals
+        self.assertEqual(metrics.aggregate()[1][('mvc_responses_total', '200')], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
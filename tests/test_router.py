@@ -0,0 +1,77 @@
+# tests/test_router.py
+
+import unittest
+
+from core.router import Router
+
+
+class ShopController:
+    def index(self, render_template_func):
+        return 'shop/index.html', {}
+
+    def show(self, render_template_func, item_id, page=1):
+        return 'shop/show.html', {'item_id': item_id, 'page': page}
+
+    def tags(self, render_template_func, *tags):
+        return 'shop/tags.html', {'tags': tags}
+
+    def search(self, render_template_func, *, query):
+        return 'shop/search.html', {'query': query}
+
+    def _helper(self, render_template_func):
+        return 'shop/helper.html', {}
+
+    @staticmethod
+    def utility(render_template_func):
+        return 'shop/utility.html', {}
+
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = Router({'shop': ShopController()})
+
+    def assertNotFound(self, path, message):
+        route, args, error = self.router.resolve(path)
+        self.assertIsNone(route)
+        self.assertEqual(error, f"404 Not Found: {message}")
+
+    def test_defaults_to_the_index_method(self):
+        route, args, error = self.router.resolve('/shop')
+        self.assertEqual((route.method_name, args, error), ('index', [], None))
+
+    def test_arity_with_defaults(self):
+        route, args, error = self.router.resolve('/shop/show/7')
+        self.assertEqual((route.method_name, args), ('show', ['7']))
+        route, args, error = self.router.resolve('/shop/show/7/2')
+        self.assertEqual(args, ['7', '2'])
+        self.assertNotFound('/shop/show', "Invalid number of arguments")
+
+    def test_extra_segments_are_not_found(self):
+        self.assertNotFound('/shop/index/extra', "Invalid number of arguments")
+        self.assertNotFound('/shop/show/7/2/3', "Invalid number of arguments")
+
+    def test_var_positional_accepts_any_number(self):
+        for path, expected in (('/shop/tags', []), ('/shop/tags/a/b/c', ['a', 'b', 'c'])):
+            with self.subTest(path=path):
+                route, args, error = self.router.resolve(path)
+                self.assertEqual((route.method_name, args), ('tags', expected))
+
+    def test_unknown_controller_and_method(self):
+        self.assertNotFound('/missing/index', "Controller not found")
+        self.assertNotFound('/shop/missing', "Method not found")
+
+    def test_dispatch_is_lowercased(self):
+        route, args, error = self.router.resolve('/SHOP/Show/AbC')
+        self.assertEqual((route.controller_name, route.method_name, args), ('shop', 'show', ['AbC']))
+
+    def test_private_and_static_methods_are_not_routes(self):
+        self.assertNotFound('/shop/_helper', "Method not found")
+        self.assertNotFound('/shop/utility', "Method not found")
+
+    def test_required_keyword_only_parameter_is_not_a_route(self):
+        self.assertNotIn(('shop', 'search'), self.router.routes)
+        self.assertNotFound('/shop/search', "Method not found")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# tests/test_streaming.py
+
+import os
+import unittest
+from unittest import mock
+
+from core.app import App
+from core.cache import request_memo
+from core.metrics import metrics
+from core.response import ClosingIterator, Response
+from core.template import stream_response
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ClosingIteratorTest(unittest.TestCase):
+    def test_close_runs_without_iterating(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield 'a'
+            finally:
+                closed.append('generator')
+
+        body = ClosingIterator(chunks(), lambda: closed.append('on_close'))
+        body.close()
+        body.close()
+        self.assertEqual(closed, ['on_close'])
+
+    def test_exhausting_closes(self):
+        closed = []
+        body = ClosingIterator(iter(['a', 'b']), lambda: closed.append(True))
+        self.assertEqual(list(body), ['a', 'b'])
+        self.assertEqual(closed, [True])
+
+    def test_abandoned_encoded_stream_closes_the_page(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield '<p>one</p>'
+                yield '<p>two</p>'
+            finally:
+                closed.append('generator')
+
+        response = Response(ClosingIterator(chunks(), lambda: closed.append('on_close')))
+        response.compress({'Accept-Encoding': 'gzip'})
+        encoded = response.iter_encoded()
+        next(encoded)
+        encoded.close()
+        self.assertEqual(closed, ['generator', 'on_close'])
+
+
+class StreamController:
+    @stream_response
+    def index(self, render_template_func):
+        return 'home/index.html', {'page_title': 'Streamed', 'items': iter(['a', 'b'])}
+
+
+class AbandonedStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.app = App(base_dir=BASE_DIR)
+        self.app.router.add_controller('stream', StreamController())
+        self.finished = []
+        finish_request = metrics.finish_request
+
+        def record_finish(timings):
+            self.finished.append(timings.route)
+            finish_request(timings)
+
+        patcher = mock.patch.object(metrics, 'finish_request', record_finish)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timings_finish_when_a_stream_is_closed_unread(self):
+        response = self.app.dispatch('/stream/index', stream=True)
+        self.assertTrue(response.streamed)
+        self.assertEqual(self.finished, [])
+        self.assertIsNone(metrics.current_request())
+        self.assertIsNone(request_memo())
+
+        response.iter_encoded().close()
+        self.assertEqual(self.finished, ['/stream/index'])
+
+    def test_timings_finish_when_a_stream_is_read_to_the_end(self):
+        response = self.app.dispatch('/stream/index', stream=True)
+        self.assertIn(b'<li>b</li>', b''.join(response.iter_encoded()))
+        self.assertEqual(self.finished, ['/stream/index'])
+
+
+if __name__ == '__main__':
+    unittest.main()
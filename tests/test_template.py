@@ -0,0 +1,108 @@
+# tests/test_template.py
+
+import unittest
+
+from core.template import CompiledTemplate, Markup, _escape_joined, _parse, escape, escape_many
+
+# Everything the escaper has to get right, including the separator of the joined fast path
+HOSTILE = ['<script>alert(1)</script>', 'Tom & Jerry', '"quoted"', "it's", 'a\0b', '\0', '', 'plain', '&amp;']
+
+
+def compile_text(text):
+    parts, slots = _parse('test.html', text)
+    return CompiledTemplate('test.html', parts, slots, {}, frozenset())
+
+
+class MissingValueTest(unittest.TestCase):
+    def test_missing_name_keeps_its_tag(self):
+        self.assertEqual(compile_text('<p>{{ user.name }}</p>').render({}), '<p>{{ user.name }}</p>')
+
+    def test_missing_key_keeps_its_tag(self):
+        template = compile_text('<p>{{ user.name }}</p>')
+        self.assertEqual(template.render({'user': {}}), '<p>{{ user.name }}</p>')
+        self.assertEqual(''.join(template.stream({'user': {}})), '<p>{{ user.name }}</p>')
+
+    def test_missing_attribute_keeps_its_tag(self):
+        template = compile_text('<p>{{ user.name }}</p>')
+        self.assertEqual(template.render({'user': object()}), '<p>{{ user.name }}</p>')
+
+    def test_loop_over_a_missing_key_renders_nothing(self):
+        template = compile_text('<ul>{{ for item in page.items }}<li>{{ item }}</li>{{ endfor }}</ul>')
+        self.assertEqual(template.render({'page': {}}), '<ul></ul>')
+
+
+class EscapeManyTest(unittest.TestCase):
+    def slow(self, values):
+        return [str(escape(value)) for value in values]
+
+    def test_matches_escape_per_value(self):
+        values = [value for value in HOSTILE if '\0' not in value]
+        self.assertIsNotNone(_escape_joined(values))
+        self.assertEqual(escape_many(values), self.slow(values))
+
+    def test_separator_in_the_data_falls_back(self):
+        self.assertIsNone(_escape_joined(HOSTILE))
+        self.assertEqual(escape_many(HOSTILE), self.slow(HOSTILE))
+
+    def test_markup_passes_through(self):
+        values = ['<b>', Markup('<b>bold</b>'), '&']
+        self.assertIsNone(_escape_joined(values))
+        self.assertEqual(escape_many(values), ['&lt;b&gt;', '<b>bold</b>', '&amp;'])
+
+    def test_non_string_values(self):
+        values = [1, 2.5, None, '<x>']
+        self.assertEqual(escape_many(values), self.slow(values))
+
+
+class LoopEscapingTest(unittest.TestCase):
+    def expected(self, items):
+        return '<ul>' + ''.join(f'<li>{escape(item)}</li>' for item in items) + '</ul>'
+
+    def test_single_slot_fast_path(self):
+        items = [value for value in HOSTILE if '\0' not in value]
+        template = compile_text('<ul>{{ for item in items }}<li>{{ item }}</li>{{ endfor }}</ul>')
+        self.assertEqual(template.render({'items': items}), self.expected(items))
+
+    def test_single_slot_with_separator_in_the_data(self):
+        template = compile_text('<ul>{{ for item in items }}<li>{{ item }}</li>{{ endfor }}</ul>')
+        self.assertEqual(template.render({'items': HOSTILE}), self.expected(HOSTILE))
+
+    def test_single_slot_with_markup(self):
+        items = ['<i>', Markup('<i>ok</i>')]
+        template = compile_text('<ul>{{ for item in items }}<li>{{ item }}</li>{{ endfor }}</ul>')
+        self.assertEqual(template.render({'items': items}), '<ul><li>&lt;i&gt;</li><li><i>ok</i></li></ul>')
+
+    def test_columns_and_outer_values(self):
+        users = [{'name': value, 'email': value[::-1]} for value in HOSTILE]
+        template = compile_text(
+            '{{ for user in users }}<tr data-x="{{ title }}"><td>{{ user.name }}</td><td>{{ user.email }}</td></tr>{{ endfor }}'
+        )
+        title = '"A&B"'
+        expected = ''.join(
+            f'<tr data-x="{escape(title)}"><td>{escape(user["name"])}</td><td>{escape(user["email"])}</td></tr>'
+            for user in users
+        )
+        self.assertEqual(template.render({'users': users, 'title': title}), expected)
+
+    def test_nested_loops(self):
+        groups = [{'name': '<g1>', 'items': ['a&b', '\0']}, {'name': 'g"2', 'items': []}]
+        template = compile_text(
+            '{{ for group in groups }}<h2>{{ group.name }}</h2>'
+            '{{ for item in group.items }}<i>{{ item }}</i>{{ endfor }}{{ endfor }}'
+        )
+        expected = ''.join(
+            f'<h2>{escape(group["name"])}</h2>' + ''.join(f'<i>{escape(item)}</i>' for item in group['items'])
+            for group in groups
+        )
+        self.assertEqual(template.render({'groups': groups}), expected)
+
+    def test_streamed_loop_matches_render(self):
+        template = compile_text('<ul>{{ for item in items }}<li>{{ item }}</li>{{ endfor }}</ul>')
+        items = HOSTILE * 500
+        streamed = ''.join(template.stream({'items': iter(items)}))
+        self.assertEqual(streamed, template.render({'items': items}))
+        self.assertEqual(streamed, self.expected(items))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,11 @@
 # wsgi.py
-from runserver import app
-application = app
+# Gunicorn entry point: gunicorn wsgi:application
+# The App is a WSGI callable itself, so Flask is not involved per request.
+# Set MVC_WSGI_FLASK=1 to serve through the Flask wrapper in runserver.py instead.
+import os
+
+if os.environ.get('MVC_WSGI_FLASK') == '1':
+    from runserver import app as application
+else:
+    from core.app import App
+    application = App(base_dir=os.path.dirname(os.path.abspath(__file__)))